@@ -11,6 +11,9 @@ items = [
     {"id": 3, "name": "Item 3", "description": "Third item"}
 ]
 
+# Index items by ID for constant-time lookup
+_items_by_id = {item['id']: item for item in items}
+
 @app.route('/')
 def home():
     return jsonify({"message": "Welcome to the Flask API!"})
@@ -23,7 +26,7 @@ def get_items():
 @app.route('/api/items/<int:item_id>', methods=['GET'])
 def get_item(item_id):
     """Get a specific item by ID"""
-    item = next((item for item in items if item['id'] == item_id), None)
+    item = _items_by_id.get(item_id)
     if item:
         return jsonify(item)
     return jsonify({"error": "Item not found"}), 404
@@ -0,0 +1,115 @@
+"""
+Cache-aside helpers for read-heavy database queries.
+Uses Redis when REDIS_URL is set and the redis package is installed;
+otherwise falls back to an in-process TTL cache, so repeated reads still
+skip Supabase within a single server process.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+from dotenv import load_dotenv
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+load_dotenv()
+
+_pool = None
+if redis is not None and os.getenv('REDIS_URL'):
+    _pool = redis.ConnectionPool.from_url(os.getenv('REDIS_URL'))
+
+# In-process fallback: key -> (expiry timestamp, serialized value). Values are
+# stored serialized so callers can't mutate a cached object in place. Expired
+# entries are swept on every set(), since keys that embed a data version are
+# never read again once the version moves on
+_local: Dict[str, Tuple[float, bytes]] = {}
+_local_lock = threading.Lock()
+
+
+def _redis() -> Optional["redis.Redis"]:
+    """Get a Redis connection from the shared pool, or None if Redis is not configured"""
+    if _pool is None:
+        return None
+    return redis.Redis(connection_pool=_pool)
+
+
+def get(key: str) -> Optional[Any]:
+    """
+    Get a cached value
+
+    Args:
+        key: Cache key
+
+    Returns:
+        Deserialized value, or None on a miss
+    """
+    conn = _redis()
+    if conn is None:
+        with _local_lock:
+            entry = _local.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del _local[key]
+                entry = None
+        return orjson.loads(entry[1]) if entry is not None else None
+
+    try:
+        raw = conn.get(key)
+    except redis.RedisError as e:
+        print(f"Cache get failed for {key}: {e}")
+        return None
+
+    return orjson.loads(raw) if raw is not None else None
+
+
+def set(key: str, value: Any, ttl: int) -> None:
+    """
+    Store a value in the cache
+
+    Args:
+        key: Cache key
+        value: JSON-serializable value (non-string dict keys are allowed)
+        ttl: Time to live in seconds
+    """
+    raw = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+    conn = _redis()
+    if conn is None:
+        now = time.monotonic()
+        with _local_lock:
+            for expired in [k for k, entry in _local.items() if entry[0] <= now]:
+                del _local[expired]
+            _local[key] = (now + ttl, raw)
+        return
+
+    try:
+        conn.set(key, raw, ex=ttl)
+    except redis.RedisError as e:
+        print(f"Cache set failed for {key}: {e}")
+
+
+def invalidate(prefix: str) -> None:
+    """
+    Delete every cached key starting with prefix
+
+    Args:
+        prefix: Key prefix (e.g. 'graph:')
+    """
+    conn = _redis()
+    if conn is None:
+        with _local_lock:
+            for key in [k for k in _local if k.startswith(prefix)]:
+                del _local[key]
+        return
+
+    try:
+        keys = list(conn.scan_iter(match=f'{prefix}*'))
+        if keys:
+            conn.delete(*keys)
+    except redis.RedisError as e:
+        print(f"Cache invalidate failed for {prefix}: {e}")
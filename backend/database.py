@@ -3,14 +3,246 @@ Database client for Supabase integration.
 Handles CRUD operations for posts, layouts, and similarities.
 """
 
-from supabase import create_client, Client
+from supabase import Client
+from postgrest import SyncPostgrestClient
+import httpx
+import gzip
+import json
 import os
-from typing import List, Dict, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Tuple
 import numpy as np
 from dotenv import load_dotenv
 
+import cache
+
 load_dotenv()
 
+# Connection pool shared by every request made through the Supabase client
+HTTP_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20)
+
+# Matches postgrest's own default; httpx's 5 s default is too short for bulk upserts and graph RPCs
+HTTP_TIMEOUT = httpx.Timeout(120.0)
+
+# Gzip request bodies larger than this many bytes (when SUPABASE_GZIP_REQUESTS is set)
+GZIP_MIN_BYTES = 1024
+
+# Decimal places kept when sending embeddings; plenty for cosine on halfvec columns
+VECTOR_DECIMALS = 4
+
+EMBEDDING_KEYS = [
+    'content_embedding', 'topic_view_embedding',
+    'tool_view_embedding', 'llm_view_embedding'
+]
+
+# Minimum cosine similarity for semantic search matches
+SEMANTIC_MATCH_THRESHOLD = 0.7
+
+# Vector search RPC for each embedding column (see migrations/006_match_posts_hnsw.sql)
+MATCH_RPC_BY_COLUMN = {
+    'content_embedding': 'match_posts_content',
+    'topic_view_embedding': 'match_posts_topic',
+    'tool_view_embedding': 'match_posts_tool',
+    'llm_view_embedding': 'match_posts_llm'
+}
+
+VIEW_MODES = ['topic', 'tool', 'llm']
+
+# Post columns returned to API clients (everything except embeddings and search_tsv)
+POST_COLUMNS = ','.join([
+    'id', 'ed_post_id', 'ed_post_number', 'title', 'content', 'author', 'date',
+    'attachment_urls', 'attachment_summaries', 'github_url', 'website_url',
+    'linkedin_url', 'topics', 'tools', 'llms', 'impressiveness_score',
+    'num_reactions', 'num_replies'
+])
+
+# Field types used to coerce layout values once per batch
+LAYOUT_DTYPE = [('x', 'f8'), ('y', 'f8'), ('cluster_id', 'i4')]
+
+# Little-endian record layout of the binary edge list (12 bytes per edge)
+EDGE_DTYPE = np.dtype([('source', '<i4'), ('target', '<i4'), ('similarity', '<f4')])
+
+# Cache-aside TTLs in seconds
+GRAPH_CACHE_TTL = 120
+POSTS_CACHE_TTL = 60
+STATS_CACHE_TTL = 30
+EMBEDDING_CACHE_TTL = POSTS_CACHE_TTL
+
+# How long a data version read from the database is trusted, in seconds.
+# Bounds how long another process's writes can go unnoticed
+DATA_VERSION_TTL = 5
+
+# Rows requested per page by full-table selects
+SELECT_PAGE_SIZE = 1000
+
+# Number of posts callers send per insert_posts_bulk request
+POST_BATCH_SIZE = 500
+
+
+class BulkWriteError(Exception):
+    """Raised when some batches of a bulk write fail; the others were still written"""
+    
+    def __init__(self, written: int, total: int, errors: List[Exception]):
+        super().__init__(
+            f"{len(errors)} batch(es) failed, {written}/{total} rows written: {errors[0]}"
+        )
+        self.written = written
+        self.total = total
+        self.errors = errors
+
+
+class GzipRequestTransport(httpx.HTTPTransport):
+    """
+    HTTP transport that gzips large request bodies
+    
+    Only enable this when the Supabase endpoint (or a gateway in front of
+    PostgREST) accepts Content-Encoding: gzip on requests. Responses are
+    already negotiated compressed through httpx's default Accept-Encoding.
+    """
+    
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        body = request.read()
+        if len(body) >= GZIP_MIN_BYTES and 'content-encoding' not in request.headers:
+            headers = request.headers.copy()
+            headers['Content-Encoding'] = 'gzip'
+            headers.pop('Content-Length', None)
+            request = httpx.Request(
+                request.method,
+                request.url,
+                headers=headers,
+                content=gzip.compress(body),
+                extensions=request.extensions
+            )
+        return super().handle_request(request)
+
+
+class PooledRestClient(Client):
+    """
+    Supabase client whose PostgREST calls go through a given httpx client
+    
+    Only PostgREST gets the shared client: storage, functions and auth each
+    rewrite base_url on the client they are handed, so they keep their own.
+    """
+    
+    def __init__(self, supabase_url: str, supabase_key: str, http_client: httpx.Client):
+        super().__init__(supabase_url, supabase_key)
+        self.rest_http_client = http_client
+    
+    @property
+    def postgrest(self) -> SyncPostgrestClient:
+        # Rebuilt lazily, as in the base class, after auth events reset it
+        if self._postgrest is None:
+            self._postgrest = SyncPostgrestClient(
+                self.rest_url,
+                headers=self.options.headers,
+                schema=self.options.schema,
+                http_client=self.rest_http_client
+            )
+        return self._postgrest
+
+
+def format_vector(embedding) -> str:
+    """
+    Format an embedding as pgvector text input (e.g. '[0.1234,-0.5678]')
+    
+    Sending a compact string instead of a JSON list of full-precision
+    floats roughly halves the request payload for embedding columns.
+    
+    Args:
+        embedding: Embedding as a list or numpy array
+        
+    Returns:
+        pgvector/halfvec literal string
+    """
+    return _vector_literal(np.asarray(embedding, dtype=np.float16).tolist())
+
+
+def _vector_literal(values: List[float]) -> str:
+    """Join already-rounded floats into a pgvector literal"""
+    return '[' + ','.join(f'{x:.{VECTOR_DECIMALS}f}' for x in values) + ']'
+
+
+def _encode_embeddings_batch(posts: List[Dict]) -> Dict[str, List[str]]:
+    """
+    Normalize and format every embedding column for a batch of posts at once
+    
+    Args:
+        posts: List of post dictionaries with embedding fields
+        
+    Returns:
+        Dictionary mapping each embedding column to one literal per post
+    """
+    encoded = {}
+    for key in EMBEDDING_KEYS:
+        matrix = np.vstack([np.asarray(p[key], dtype=np.float32) for p in posts])
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        encoded[key] = [_vector_literal(row) for row in matrix.astype(np.float16).tolist()]
+    return encoded
+
+
+def _encode_layouts_batch(posts: List[Dict]) -> List[Dict[str, Dict]]:
+    """
+    Build every post's layouts column value with one NumPy cast
+    
+    Args:
+        posts: List of post dictionaries with '{view_mode}_layout' fields
+        
+    Returns:
+        One {view_mode: {'x', 'y', 'cluster_id'}} dictionary per post with
+        native float/int values
+    """
+    layouts = np.array(
+        [
+            [
+                (layout['x'], layout['y'], layout['cluster_id'])
+                for layout in (post[f'{view_mode}_layout'] for view_mode in VIEW_MODES)
+            ]
+            for post in posts
+        ],
+        dtype=LAYOUT_DTYPE
+    )
+    return [
+        {
+            view_mode: {'x': x, 'y': y, 'cluster_id': cluster_id}
+            for view_mode, (x, y, cluster_id) in zip(VIEW_MODES, row)
+        }
+        for row in layouts.tolist()
+    ]
+
+
+def _parse_vector(value) -> np.ndarray:
+    """Parse a pgvector value returned by PostgREST (a '[...]' string or a list)"""
+    if isinstance(value, str):
+        value = json.loads(value)
+    return np.asarray(value, dtype=np.float32)
+
+
+def _cosine_topk(
+    query_emb: np.ndarray,
+    matrix: np.ndarray,
+    k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the k rows of matrix most similar to query_emb
+    
+    Args:
+        query_emb: (D,) normalized query embedding
+        matrix: (N, D) row-normalized embedding matrix, so dot product = cosine
+        k: Number of results
+        
+    Returns:
+        indices: Row indices of the top-k matches, most similar first
+        similarities: Cosine similarity of each match
+    """
+    sims = matrix @ query_emb
+    k = min(k, len(sims))
+    top = np.argpartition(-sims, k - 1)[:k] if k > 0 else np.empty(0, dtype=np.intp)
+    top = top[np.argsort(-sims[top])]
+    return top, sims[top]
+
 
 class SupabaseClient:
     """Client for interacting with Supabase database"""
@@ -24,20 +256,29 @@ class SupabaseClient:
                 "SUPABASE_URL and SUPABASE_KEY must be set in environment variables"
             )
         
-        self.client: Client = create_client(supabase_url, supabase_key)
-    
-    def insert_post(self, post_data: Dict) -> int:
-        """
-        Insert post with embeddings and layouts
+        if os.getenv('SUPABASE_GZIP_REQUESTS', '').lower() in ('1', 'true', 'yes'):
+            transport = GzipRequestTransport(limits=HTTP_LIMITS)
+        else:
+            transport = httpx.HTTPTransport(limits=HTTP_LIMITS)
         
-        Args:
-            post_data: Dictionary containing all post information
-            
-        Returns:
-            Database ID of the inserted post
-        """
-        # Prepare post row
-        post_row = {
+        self.http_client = httpx.Client(transport=transport, timeout=HTTP_TIMEOUT)
+        self.client: Client = PooledRestClient(supabase_url, supabase_key, self.http_client)
+        
+        # Row-normalized embedding matrices kept in memory for semantic search:
+        # column -> (data version, expiry, post IDs, matrix)
+        self._embedding_matrices: Dict[str, Tuple[Optional[int], float, List[int], np.ndarray]] = {}
+        
+        # ed_post_id -> database ID for posts known to exist (misses are not stored)
+        self._ed_id_cache: Dict[int, int] = {}
+    
+    @staticmethod
+    def _build_post_row(
+        post_data: Dict,
+        embeddings: Dict[str, str],
+        layouts: Dict[str, Dict]
+    ) -> Dict:
+        """Build a posts table row from a processed post and its encoded embeddings/layouts"""
+        return {
             'ed_post_id': post_data['ed_post_id'],
             'ed_post_number': post_data.get('ed_post_number'),  # Sequential post number shown in UI
             'title': post_data['title'],
@@ -52,41 +293,123 @@ class SupabaseClient:
             'topics': post_data['topics'],
             'tools': post_data['tools'],
             'llms': post_data['llms'],
-            'content_embedding': post_data['content_embedding'] if isinstance(post_data['content_embedding'], list) else post_data['content_embedding'].tolist(),
-            'topic_view_embedding': post_data['topic_view_embedding'] if isinstance(post_data['topic_view_embedding'], list) else post_data['topic_view_embedding'].tolist(),
-            'tool_view_embedding': post_data['tool_view_embedding'] if isinstance(post_data['tool_view_embedding'], list) else post_data['tool_view_embedding'].tolist(),
-            'llm_view_embedding': post_data['llm_view_embedding'] if isinstance(post_data['llm_view_embedding'], list) else post_data['llm_view_embedding'].tolist(),
             'impressiveness_score': post_data['impressiveness_score'],
             'num_reactions': post_data.get('num_reactions', 0),
-            'num_replies': post_data.get('num_replies', 0)
+            'num_replies': post_data.get('num_replies', 0),
+            'layouts': layouts,
+            **embeddings
         }
+    
+    def invalidate_cache(self):
+        """Drop cached query results after a write"""
+        self._embedding_matrices.clear()
+        cache.invalidate('data_version')
+        cache.invalidate('graph:')
+        cache.invalidate('posts:')
+        cache.invalidate('stats')
+    
+    def data_version(self) -> Optional[int]:
+        """
+        Get the current data version (see migrations/009_data_version.sql)
+        
+        Every write to posts or post_similarities, from any process, bumps it.
+        Cached results are keyed on it, so they are rebuilt once the data
+        changes. The value is cached for DATA_VERSION_TTL seconds.
+        
+        Returns:
+            Data version, or None if it could not be read (caches then fall
+            back to their TTLs alone)
+        """
+        version = cache.get('data_version')
+        if version is not None:
+            return version
+        
+        try:
+            version = self.client.rpc('get_data_version').execute().data
+        except Exception as e:
+            print(f"Could not read data version: {e}")
+            return None
+        
+        cache.set('data_version', version, DATA_VERSION_TTL)
+        return version
+    
+    def insert_post(self, post_data: Dict) -> int:
+        """
+        Insert post with embeddings and layouts
+        
+        Args:
+            post_data: Dictionary containing all post information
+            
+        Returns:
+            Database ID of the inserted post
+        """
+        return self.insert_posts_bulk([post_data])[post_data['ed_post_id']]
+    
+    def insert_posts_bulk(self, posts: List[Dict]) -> Dict[int, int]:
+        """
+        Insert a batch of posts with embeddings and layouts in one request
         
-        # Insert post
+        Layouts are stored in the posts.layouts JSONB column
+        (see migrations/008_posts_layouts_jsonb.sql).
+        
+        Args:
+            posts: List of post dictionaries (same shape as insert_post)
+            
+        Returns:
+            Mapping of ed_post_id to database ID for the inserted posts
+        """
+        if not posts:
+            return {}
+        
+        embeddings = _encode_embeddings_batch(posts)
+        layouts = _encode_layouts_batch(posts)
+        post_rows = [
+            self._build_post_row(
+                post_data, dict(zip(EMBEDDING_KEYS, row_embeddings)), post_layouts
+            )
+            for post_data, row_embeddings, post_layouts in zip(
+                posts, zip(*(embeddings[key] for key in EMBEDDING_KEYS)), layouts
+            )
+        ]
+        
+        # Insert all posts (with their layouts) at once
         result = self.client.table('posts').upsert(
-            post_row,
+            post_rows,
             on_conflict='ed_post_id'
         ).execute()
         
-        post_id = result.data[0]['id']
+        ed_to_db = {row['ed_post_id']: row['id'] for row in result.data}
         
-        # Insert layouts for each view mode
-        for view_mode in ['topic', 'tool', 'llm']:
-            layout = post_data[f'{view_mode}_layout']
-            
-            # Delete existing layout if any
-            self.client.table('graph_layouts').delete().eq(
-                'post_id', post_id
-            ).eq('view_mode', view_mode).execute()
+        self._ed_id_cache.update(ed_to_db)
+        self.invalidate_cache()
+        
+        return ed_to_db
+    
+    def _resolve_ed_id(self, ed_post_id: int) -> Optional[int]:
+        """
+        Resolve an ed_post_id to its database ID
+        
+        Found IDs are memoized per client; a miss is looked up again next
+        time, since the post may be inserted later.
+        
+        Args:
+            ed_post_id: EdStem thread ID of the post
             
-            # Insert new layout
-            self.client.table('graph_layouts').insert({
-                'post_id': post_id,
-                'view_mode': view_mode,
-                'x': float(layout['x']),
-                'y': float(layout['y']),
-                'cluster_id': int(layout['cluster_id'])
-            }).execute()
+        Returns:
+            Database ID of the post or None if not found
+        """
+        post_id = self._ed_id_cache.get(ed_post_id)
+        if post_id is not None:
+            return post_id
+        
+        result = self.client.table('posts').select('id').eq(
+            'ed_post_id', ed_post_id
+        ).execute()
+        if not result.data:
+            return None
         
+        post_id = result.data[0]['id']
+        self._ed_id_cache[ed_post_id] = post_id
         return post_id
     
     def insert_similarity(
@@ -99,6 +422,9 @@ class SupabaseClient:
         """
         Insert edge similarity between two posts
         
+        Cached reads are not invalidated per edge; call invalidate_cache()
+        once after writing a batch (insert_similarities_bulk does this itself).
+        
         Args:
             post_id_1: First post's ed_post_id
             post_id_2: Second post's ed_post_id
@@ -106,16 +432,10 @@ class SupabaseClient:
             similarity: Similarity score (0-1)
         """
         # Get internal IDs
-        p1 = self.client.table('posts').select('id').eq(
-            'ed_post_id', post_id_1
-        ).execute()
-        p2 = self.client.table('posts').select('id').eq(
-            'ed_post_id', post_id_2
-        ).execute()
+        id1 = self._resolve_ed_id(post_id_1)
+        id2 = self._resolve_ed_id(post_id_2)
         
-        if p1.data and p2.data:
-            id1, id2 = p1.data[0]['id'], p2.data[0]['id']
-            
+        if id1 is not None and id2 is not None:
             # Ensure id1 < id2 for consistency
             if id1 > id2:
                 id1, id2 = id2, id1
@@ -128,6 +448,112 @@ class SupabaseClient:
                 'similarity': float(similarity)
             }, on_conflict='post_id_1,post_id_2,view_mode').execute()
     
+    def _select_all(self, columns: str) -> List[Dict]:
+        """
+        Select columns from every post, one page at a time
+        
+        A single select is cut off at PostgREST's max-rows. Pages advance by
+        the rows actually returned, since the server may cap them below
+        SELECT_PAGE_SIZE.
+        
+        Args:
+            columns: Comma-separated column list
+            
+        Returns:
+            List of row dictionaries, ordered by ID
+        """
+        rows = []
+        start = 0
+        while True:
+            page = self.client.table('posts').select(columns).order('id').range(
+                start, start + SELECT_PAGE_SIZE - 1
+            ).execute().data
+            if not page:
+                return rows
+            rows.extend(page)
+            start += len(page)
+    
+    def get_post_id_map(self) -> Dict[int, int]:
+        """
+        Get mapping of ed_post_id to database ID for all posts
+        
+        Returns:
+            Dictionary mapping ed_post_id to internal post ID
+        """
+        return {row['ed_post_id']: row['id'] for row in self._select_all('id,ed_post_id')}
+    
+    def insert_similarities_bulk(
+        self,
+        edges: List[Tuple[int, int, float]],
+        view_mode: str,
+        id_map: Dict[int, int],
+        batch_size: int = 1000,
+        max_workers: int = 8
+    ) -> int:
+        """
+        Insert edge similarities for one view mode in batched upserts
+        
+        Args:
+            edges: List of (ed_post_id_1, ed_post_id_2, similarity) tuples
+            view_mode: View mode ('topic', 'tool', or 'llm')
+            id_map: Mapping of ed_post_id to database ID (see get_post_id_map)
+            batch_size: Maximum number of rows per upsert request
+            max_workers: Maximum number of upsert requests in flight at once
+            
+        Returns:
+            Number of similarity rows written
+            
+        Raises:
+            BulkWriteError: If any batch failed, after the remaining batches
+                were written; its written attribute holds the rows that were
+        """
+        # Key rows by their conflict target so one request never upserts the same row twice
+        rows = {}
+        for post_id_1, post_id_2, similarity in edges:
+            id1, id2 = id_map.get(post_id_1), id_map.get(post_id_2)
+            if id1 is None or id2 is None:
+                continue
+            
+            # Ensure id1 < id2 for consistency
+            if id1 > id2:
+                id1, id2 = id2, id1
+            
+            rows[(id1, id2)] = {
+                'post_id_1': id1,
+                'post_id_2': id2,
+                'view_mode': view_mode,
+                'similarity': float(similarity)
+            }
+        
+        rows = list(rows.values())
+        
+        def upsert_batch(batch: List[Dict]) -> int:
+            self.client.table('post_similarities').upsert(
+                batch,
+                on_conflict='post_id_1,post_id_2,view_mode'
+            ).execute()
+            return len(batch)
+        
+        # Batches are independent, so send them concurrently over the shared pool.
+        # A failed batch doesn't stop the others; its error is collected instead
+        batches = [rows[start:start + batch_size] for start in range(0, len(rows), batch_size)]
+        written = 0
+        errors = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for future in as_completed([executor.submit(upsert_batch, b) for b in batches]):
+                try:
+                    written += future.result()
+                except Exception as e:
+                    errors.append(e)
+        
+        if written:
+            self.invalidate_cache()
+        
+        if errors:
+            raise BulkWriteError(written, len(rows), errors)
+        
+        return written
+    
     def get_all_posts(self) -> List[Dict]:
         """
         Get all posts from database
@@ -135,8 +561,14 @@ class SupabaseClient:
         Returns:
             List of post dictionaries
         """
-        result = self.client.table('posts').select('*').execute()
-        return result.data
+        cache_key = f'posts:{self.data_version()}:all'
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        posts = self._select_all(POST_COLUMNS)
+        cache.set(cache_key, posts, POSTS_CACHE_TTL)
+        return posts
     
     def get_post_by_id(self, post_id: int) -> Optional[Dict]:
         """
@@ -148,7 +580,7 @@ class SupabaseClient:
         Returns:
             Post dictionary or None if not found
         """
-        result = self.client.table('posts').select('*').eq('id', post_id).execute()
+        result = self.client.table('posts').select(POST_COLUMNS).eq('id', post_id).execute()
         return result.data[0] if result.data else None
     
     def get_graph_data(self, view_mode: str) -> Dict:
@@ -161,41 +593,19 @@ class SupabaseClient:
         Returns:
             Dictionary with 'nodes', 'edges', and 'cluster_names' keys
         """
-        # Get all posts
-        posts = self.client.table('posts').select('*').execute()
+        cache_key = f'graph:{self.data_version()}:{view_mode}'
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
         
-        # Get layouts for this view
-        layouts = self.client.table('graph_layouts').select('*').eq(
-            'view_mode', view_mode
-        ).execute()
+        # Get posts with their layout for this view inlined (embeddings excluded)
+        # via the get_graph_nodes RPC (see migrations/008_posts_layouts_jsonb.sql)
+        nodes = self.client.rpc('get_graph_nodes', {'view_mode': view_mode}).execute().data
         
-        # Create a map of post_id to layout
-        layout_map = {l['post_id']: l for l in layouts.data}
-        
-        # Combine posts with their layouts
-        nodes = []
-        cluster_posts = {} # Group posts by cluster for naming
-        
-        for post in posts.data:
-            layout = layout_map.get(post['id'])
-            if layout:
-                cid = layout['cluster_id']
-                node = {
-                    **post,
-                    'x': layout['x'],
-                    'y': layout['y'],
-                    'cluster_id': cid
-                }
-                # Group for cluster naming
-                if cid not in cluster_posts:
-                    cluster_posts[cid] = []
-                cluster_posts[cid].append(post)
-                
-                # Remove embeddings from node data to reduce payload size
-                for key in ['content_embedding', 'topic_view_embedding', 
-                           'tool_view_embedding', 'llm_view_embedding']:
-                    node.pop(key, None)
-                nodes.append(node)
+        # Group posts by cluster for naming
+        cluster_posts = {}
+        for node in nodes:
+            cluster_posts.setdefault(node['cluster_id'], []).append(node)
         
         # Compute cluster names if not already provided (fallback)
         cluster_names = {}
@@ -220,7 +630,9 @@ class SupabaseClient:
                 cluster_names[cid] = f"Cluster {cid}"
         
         # Get edges for this view
-        edges_result = self.client.table('post_similarities').select('*').eq(
+        edges_result = self.client.table('post_similarities').select(
+            'post_id_1,post_id_2,similarity'
+        ).eq(
             'view_mode', view_mode
         ).execute()
         
@@ -233,11 +645,35 @@ class SupabaseClient:
             for edge in edges_result.data
         ]
         
-        return {
+        graph_data = {
             'nodes': nodes,
             'edges': edges,
             'cluster_names': cluster_names
         }
+        cache.set(cache_key, graph_data, GRAPH_CACHE_TTL)
+        
+        return graph_data
+    
+    def get_graph_edges_binary(self, view_mode: str) -> bytes:
+        """
+        Get the edges of a view as packed binary records
+        
+        Each edge is EDGE_DTYPE: int32 source, int32 target, float32 similarity,
+        little-endian, so clients can decode it with a typed-array view instead
+        of parsing JSON.
+        
+        Args:
+            view_mode: View mode ('topic', 'tool', or 'llm')
+            
+        Returns:
+            Packed edge records
+        """
+        edges = self.get_graph_data(view_mode)['edges']
+        records = np.array(
+            [(edge['source'], edge['target'], edge['similarity']) for edge in edges],
+            dtype=EDGE_DTYPE
+        )
+        return records.tobytes()
     
     def search_posts(
         self, 
@@ -265,7 +701,7 @@ class SupabaseClient:
         # Check if query is a pure number (post number search)
         if query.isdigit():
             post_number = int(query)
-            post_results = self.client.table('posts').select('*').eq('ed_post_number', post_number).limit(limit).execute()
+            post_results = self.client.table('posts').select(POST_COLUMNS).eq('ed_post_number', post_number).limit(limit).execute()
             return post_results.data
         
         # Check if query matches MM-DD-YYYY date pattern
@@ -280,7 +716,7 @@ class SupabaseClient:
                 search_date = date_obj.strftime('%Y-%m-%d')
                 
                 # Get all posts and filter by date in Python (since TIMESTAMP casting is problematic)
-                all_posts = self.client.table('posts').select('*').execute()
+                all_posts = self.client.table('posts').select(POST_COLUMNS).execute()
                 date_results = []
                 for post in all_posts.data:
                     # Extract date part from timestamp (format: YYYY-MM-DDTHH:MM:SS or similar)
@@ -294,9 +730,10 @@ class SupabaseClient:
                 print(f"Invalid date format: {e}")
                 return []
         
-        # Default: Keyword search using PostgreSQL text search
-        keyword_results = self.client.table('posts').select('*').or_(
-            f'title.ilike.%{query}%,content.ilike.%{query}%,author.ilike.%{query}%'
+        # Default: Keyword search using the GIN-indexed search_tsv column
+        # (see migrations/003_posts_search_tsv.sql)
+        keyword_results = self.client.table('posts').select(POST_COLUMNS).text_search(
+            'search_tsv', query, options={'config': 'english', 'type': 'websearch'}
         ).limit(limit).execute()
         
         results = keyword_results.data
@@ -306,27 +743,26 @@ class SupabaseClient:
             try:
                 from ingestion.embedder import PostEmbedder
                 embedder = PostEmbedder()
-                query_emb = embedder.embed_content(query).tolist()
+                query_vec = embedder.embed_content(query)
                 
                 # Determine which embedding column to use
                 emb_column = f'{view_mode}_view_embedding' if view_mode != 'content' else 'content_embedding'
                 
-                # Use RPC function for vector similarity
-                semantic_results = self.client.rpc('match_posts', {
-                    'query_embedding': query_emb,
-                    'match_threshold': 0.7,
-                    'match_count': limit,
-                    'view_column': emb_column
-                }).execute()
+                semantic_ids = self._semantic_match_ids(query_vec, emb_column, limit)
                 
                 # Merge results (avoid duplicates)
                 existing_ids = {p['id'] for p in results}
-                for post in semantic_results.data:
-                    if post['id'] not in existing_ids:
-                        # Fetch full post data
-                        full_post = self.get_post_by_id(post['id'])
-                        if full_post:
-                            results.append(full_post)
+                new_ids = [post_id for post_id in semantic_ids if post_id not in existing_ids]
+                
+                if new_ids:
+                    # Fetch full post data in one request, keeping similarity order
+                    full_posts = self.client.table('posts').select(POST_COLUMNS).in_(
+                        'id', new_ids
+                    ).execute()
+                    posts_by_id = {p['id']: p for p in full_posts.data}
+                    results.extend(
+                        posts_by_id[post_id] for post_id in new_ids if post_id in posts_by_id
+                    )
                 
             except Exception as e:
                 print(f"Semantic search failed: {e}")
@@ -334,21 +770,122 @@ class SupabaseClient:
         
         return results
     
+    def _get_embedding_matrix(self, emb_column: str) -> Tuple[List[int], np.ndarray]:
+        """
+        Load (and keep resident) all post embeddings of one column
+        
+        The matrix is reloaded when the data version changes or after
+        EMBEDDING_CACHE_TTL seconds, so writes from other processes are seen.
+        
+        Args:
+            emb_column: Embedding column name
+            
+        Returns:
+            Tuple of (post IDs, row-normalized (N, D) float32 matrix)
+        """
+        version = self.data_version()
+        entry = self._embedding_matrices.get(emb_column)
+        if entry is not None and entry[0] == version and entry[1] > time.monotonic():
+            return entry[2], entry[3]
+        
+        rows = [row for row in self._select_all(f'id,{emb_column}') if row.get(emb_column) is not None]
+        ids = [row['id'] for row in rows]
+        if rows:
+            matrix = np.vstack([_parse_vector(row[emb_column]) for row in rows])
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix /= norms
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+        
+        self._embedding_matrices[emb_column] = (
+            version, time.monotonic() + EMBEDDING_CACHE_TTL, ids, matrix
+        )
+        return ids, matrix
+    
+    def _semantic_match_ids(
+        self,
+        query_emb: np.ndarray,
+        emb_column: str,
+        limit: int
+    ) -> List[int]:
+        """
+        Get IDs of posts semantically similar to a query embedding
+        
+        Scores against the in-memory embedding matrix, falling back to the
+        column's match_posts_* RPC if the matrix cannot be loaded.
+        
+        Args:
+            query_emb: Normalized query embedding
+            emb_column: Embedding column to compare against
+            limit: Maximum number of matches
+            
+        Returns:
+            Post IDs ordered by similarity
+        """
+        try:
+            ids, matrix = self._get_embedding_matrix(emb_column)
+        except Exception as e:
+            print(f"Could not load {emb_column} matrix, using vector search RPC: {e}")
+        else:
+            if not ids:
+                return []
+            top, sims = _cosine_topk(np.asarray(query_emb, dtype=np.float32), matrix, limit)
+            return [ids[i] for i, sim in zip(top, sims) if sim > SEMANTIC_MATCH_THRESHOLD]
+        
+        # Use the column-specific RPC so its HNSW index can be used
+        semantic_results = self.client.rpc(MATCH_RPC_BY_COLUMN[emb_column], {
+            'query_embedding': format_vector(query_emb),
+            'match_threshold': SEMANTIC_MATCH_THRESHOLD,
+            'match_count': limit
+        }).execute()
+        return [post['id'] for post in semantic_results.data]
+    
     def clear_all_data(self):
         """Clear all posts, layouts, and similarities (for testing)"""
-        self.client.table('post_similarities').delete().neq('id', 0).execute()
-        self.client.table('graph_layouts').delete().neq('id', 0).execute()
-        self.client.table('posts').delete().neq('id', 0).execute()
+        # Truncate all three tables in one transaction
+        # (see migrations/007_reset_graph_data.sql)
+        self.client.rpc('reset_graph_data').execute()
+        self._ed_id_cache.clear()
+        self.invalidate_cache()
     
     def get_stats(self) -> Dict:
         """Get database statistics"""
-        posts_count = len(self.client.table('posts').select('id').execute().data)
-        layouts_count = len(self.client.table('graph_layouts').select('id').execute().data)
-        similarities_count = len(self.client.table('post_similarities').select('id').execute().data)
+        cache_key = f'stats:{self.data_version()}'
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
         
-        return {
-            'posts': posts_count,
-            'layouts': layouts_count,
-            'similarities': similarities_count
+        # Count all three tables server-side in one call
+        # (see migrations/005_get_table_counts.sql)
+        counts = self.client.rpc('get_table_counts').execute().data
+        if isinstance(counts, list):
+            counts = counts[0]
+        
+        stats = {
+            'posts': counts['posts'],
+            'layouts': counts['layouts'],
+            'similarities': counts['similarities']
         }
+        cache.set(cache_key, stats, STATS_CACHE_TTL)
+        
+        return stats
+
+
+_INSTANCE: Optional[SupabaseClient] = None
 
+
+def get_client() -> SupabaseClient:
+    """
+    Get the process-wide SupabaseClient, creating it on first use
+    
+    Reusing one client keeps its HTTP connection pool warm instead of
+    paying connection and TLS setup for every request.
+    
+    Raises:
+        ValueError: If SUPABASE_URL or SUPABASE_KEY is not set
+    """
+    global _INSTANCE
+    if _INSTANCE is None:
+        _INSTANCE = SupabaseClient()
+    return _INSTANCE
@@ -3,10 +3,86 @@ Database utility script for managing Supabase data
 Run this script to load data from processed_posts.json into Supabase
 """
 
-import json
+import asyncio
 import sys
 from pathlib import Path
-from database import SupabaseClient
+from typing import List, Dict
+
+import orjson
+from database import get_client, BulkWriteError, POST_BATCH_SIZE
+
+# Maximum number of upsert requests in flight at once
+MAX_CONCURRENT_REQUESTS = 20
+
+
+async def _insert_post_batches(db, posts: List[Dict]) -> int:
+    """
+    Upsert posts in concurrent batches
+    
+    Args:
+        db: SupabaseClient instance
+        posts: List of processed post dictionaries
+        
+    Returns:
+        Number of posts inserted successfully
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    
+    async def insert_batch(start: int) -> int:
+        batch = posts[start:start + POST_BATCH_SIZE]
+        async with semaphore:
+            try:
+                await asyncio.to_thread(db.insert_posts_bulk, batch)
+            except Exception as e:
+                print(f"  Error inserting posts {start + 1}-{start + len(batch)}: {e}")
+                return 0
+        print(f"  Inserted posts {start + 1}-{start + len(batch)}/{len(posts)}")
+        return len(batch)
+    
+    counts = await asyncio.gather(
+        *(insert_batch(start) for start in range(0, len(posts), POST_BATCH_SIZE))
+    )
+    return sum(counts)
+
+
+async def _insert_view_similarities(
+    db,
+    posts: List[Dict],
+    layout_data: Dict,
+    id_map: Dict[int, int]
+) -> None:
+    """
+    Upsert the similarity edges of every view mode concurrently
+    
+    Args:
+        db: SupabaseClient instance
+        posts: List of processed post dictionaries (edges index into it)
+        layout_data: Layout data containing '{view_mode}_similarities' lists
+        id_map: Mapping of ed_post_id to database ID
+    """
+    async def insert_view(view_mode: str) -> None:
+        similarities = layout_data.get(f'{view_mode}_similarities', [])
+        edges = [
+            (posts[idx1]['ed_post_id'], posts[idx2]['ed_post_id'], sim)
+            for idx1, idx2, sim in similarities
+        ]
+        
+        try:
+            successful_sims = await asyncio.to_thread(
+                db.insert_similarities_bulk, edges, view_mode, id_map
+            )
+        except BulkWriteError as e:
+            successful_sims = e.written
+            print(f"    Error inserting {view_mode} similarities: {e}")
+        except Exception as e:
+            successful_sims = 0
+            print(f"    Error inserting {view_mode} similarities: {e}")
+        
+        print(f"  {view_mode} edges inserted: {successful_sims}/{len(similarities)}")
+        if successful_sims < len(similarities):
+            print(f"  Failed {view_mode} edges: {len(similarities) - successful_sims}")
+    
+    await asyncio.gather(*(insert_view(view_mode) for view_mode in ['topic', 'tool', 'llm']))
 
 
 def load_data_from_json(json_path: Path = None):
@@ -18,7 +94,7 @@ def load_data_from_json(json_path: Path = None):
     """
     # Initialize database
     try:
-        db = SupabaseClient()
+        db = get_client()
     except ValueError as e:
         print(f"Error: {e}")
         print("Please set SUPABASE_URL and SUPABASE_KEY in your .env file")
@@ -36,8 +112,8 @@ def load_data_from_json(json_path: Path = None):
     print(f"Loading data from: {json_path}")
     
     # Load JSON data
-    with open(json_path, 'r') as f:
-        data = json.load(f)
+    with open(json_path, 'rb') as f:
+        data = orjson.loads(f.read())
     
     posts = data.get('posts', [])
     layout_data = data.get('layout_data', {})
@@ -46,22 +122,8 @@ def load_data_from_json(json_path: Path = None):
     
     # Insert posts
     print("\nInserting posts into database...")
-    successful_posts = 0
-    failed_posts = 0
-    
-    for i, post in enumerate(posts):
-        try:
-            db.insert_post(post)
-            successful_posts += 1
-            
-            # Progress indicator
-            if (i + 1) % 10 == 0:
-                print(f"  Inserted {i + 1}/{len(posts)} posts")
-                
-        except Exception as e:
-            failed_posts += 1
-            if failed_posts <= 3:  # Only show first 3 errors
-                print(f"  Error inserting post {post.get('ed_post_id')}: {e}")
+    successful_posts = asyncio.run(_insert_post_batches(db, posts))
+    failed_posts = len(posts) - successful_posts
     
     print(f"\nPosts inserted: {successful_posts}/{len(posts)}")
     if failed_posts > 0:
@@ -69,32 +131,13 @@ def load_data_from_json(json_path: Path = None):
     
     # Insert similarities
     print("\nInserting similarities...")
-    for view_mode in ['topic', 'tool', 'llm']:
-        similarities = layout_data.get(f'{view_mode}_similarities', [])
-        print(f"\n  Processing {view_mode} view ({len(similarities)} edges)...")
-        
-        successful_sims = 0
-        failed_sims = 0
-        
-        for i, (idx1, idx2, sim) in enumerate(similarities):
-            try:
-                post_id_1 = posts[idx1]['ed_post_id']
-                post_id_2 = posts[idx2]['ed_post_id']
-                db.insert_similarity(post_id_1, post_id_2, view_mode, sim)
-                successful_sims += 1
-                
-                # Progress indicator
-                if (i + 1) % 50 == 0:
-                    print(f"    Inserted {i + 1}/{len(similarities)} edges")
-                    
-            except Exception as e:
-                failed_sims += 1
-                if failed_sims <= 3:  # Only show first 3 errors
-                    print(f"    Error inserting similarity: {e}")
-        
-        print(f"  {view_mode} edges inserted: {successful_sims}/{len(similarities)}")
-        if failed_sims > 0:
-            print(f"  Failed edges: {failed_sims}")
+    try:
+        id_map = db.get_post_id_map()
+    except Exception as e:
+        print(f"  Error fetching post IDs: {e}")
+        id_map = {}
+    
+    asyncio.run(_insert_view_similarities(db, posts, layout_data, id_map))
     
     # Show final stats
     print("\n" + "=" * 50)
@@ -117,7 +160,7 @@ def load_data_from_json(json_path: Path = None):
 def clear_database():
     """Clear all data from the database"""
     try:
-        db = SupabaseClient()
+        db = get_client()
     except ValueError as e:
         print(f"Error: {e}")
         return False
@@ -142,7 +185,7 @@ def clear_database():
 def show_stats():
     """Show database statistics"""
     try:
-        db = SupabaseClient()
+        db = get_client()
     except ValueError as e:
         print(f"Error: {e}")
         return False
@@ -8,6 +8,22 @@ from .embedder import PostEmbedder
 from .categorizer import PostCategorizer
 from .graph_builder import GraphBuilder
 
+import html
+import io
+import os
+import re
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import orjson
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
 __all__ = [
     'extract_pdf_text',
     'process_attachments',
@@ -17,6 +33,159 @@ __all__ = [
     'run_ingestion_pipeline'
 ]
 
+# Precompiled patterns used per post
+_RE_BARE_AMP = re.compile(r'&(?!#?\w+;)')
+# Every EdStem XML construct the regex fallback rewrites, as one alternation.
+# More specific alternatives come first since the first match at a position wins.
+_RE_XML_TOKEN = re.compile(
+    r'(?P<pclose></paragraph>)|(?P<popen><paragraph[^>]*>)'
+    r'|(?P<liclose></list-item>)|(?P<liopen><list-item[^>]*>)'
+    r'|(?P<lclose></list>)|(?P<lopen><list[^>]*>)'
+    r'|(?P<bqclose></blockquote>)|(?P<bqopen><blockquote[^>]*>)'
+    r'|(?P<hclose></heading[^>]*>)|(?P<hlevel><heading[^>]*level="(?P<level>\d+)"[^>]*>)'
+    r'|(?P<hopen><heading[^>]*>)'
+    r'|(?P<link><link[^>]*>.*?</link>)'
+    r'|(?P<bold></?bold[^>]*>)|(?P<italic></?italic[^>]*>)|(?P<underline></?underline[^>]*>)'
+    r'|(?P<br><break\s*/>)'
+    r'|(?P<ent>&(?:#\d+|#[xX][0-9a-fA-F]+|\w+);)'
+    r'|(?P<tag><[^>]+>)',
+    re.DOTALL
+)
+_RE_BREAK = re.compile(r'<break\s*/>')
+_RE_LINK_HREF = re.compile(r'href="([^"]+)"')
+_RE_LINK_TEXT = re.compile(r'>([^<]+)</link>')
+_RE_WS = re.compile(r'[ \t]+')
+_RE_TRAILING_WS = re.compile(r'[^\S\n]+(?=\n)')
+_RE_GITHUB = re.compile(r'github\.com/[\w-]+(?:/[\w-]+)?')
+_RE_LINKEDIN = re.compile(r'linkedin\.com/in/[\w-]+')
+# GitHub, LinkedIn and website URLs (excluding github, linkedin, edstem) in one scan
+_RE_URL = re.compile(
+    r'(?P<github_url>github\.com/[\w-]+(?:/[\w-]+)?)'
+    r'|(?P<linkedin_url>linkedin\.com/in/[\w-]+)'
+    r'|(?P<website_url>https?://(?!github\.com|linkedin\.com|edstem\.org)[\w.-]+\.[\w]+(?:/[\w.-]*)*)'
+)
+
+# Fixed replacements for _RE_XML_TOKEN groups (file and other tags map to '')
+_XML_TOKEN_REPLACEMENTS = {
+    'pclose': '\n', 'popen': '',
+    'liclose': '\n', 'liopen': '• ',
+    'lclose': '\n', 'lopen': '',
+    'bqclose': '\n', 'bqopen': '\n> ',
+    'hclose': '\n\n', 'hopen': '\n## ',
+    'bold': '**', 'italic': '*', 'underline': '__',
+    'br': '\n', 'tag': '',
+}
+
+# Markdown emitted before and after the content of simple EdStem XML tags
+_XML_TAG_MARKERS = {
+    'paragraph': ('', '\n'),
+    'list-item': ('• ', '\n'),
+    'list': ('', '\n'),
+    'blockquote': ('\n> ', '\n'),
+    'bold': ('**', '**'),
+    'italic': ('*', '*'),
+    'underline': ('__', '__'),
+    'break': ('\n', ''),
+}
+
+
+def _xml_tree_to_text(xml_content: str) -> Optional[str]:
+    """
+    Convert EdStem XML to markdown-style text with one lxml parse and tree walk.
+    
+    Returns None if lxml is unavailable or the content cannot be parsed.
+    """
+    if etree is None:
+        return None
+    
+    # Escape bare ampersands (common in plain-text titles) so they survive parsing
+    xml_content = _RE_BARE_AMP.sub('&amp;', xml_content)
+    
+    parser = etree.XMLParser(recover=True, huge_tree=False, resolve_entities=False)
+    try:
+        root = etree.fromstring(f'<root>{xml_content}</root>'.encode('utf-8'), parser=parser)
+    except etree.XMLSyntaxError:
+        return None
+    if root is None:
+        return None
+    
+    out = io.StringIO()
+    # Explicit stack of (element, entering) pairs instead of recursion
+    stack = [(root, True)]
+    while stack:
+        elem, entering = stack.pop()
+        tag = elem.tag if isinstance(elem.tag, str) else None
+        
+        if not entering:
+            if tag in _XML_TAG_MARKERS:
+                out.write(_XML_TAG_MARKERS[tag][1])
+            elif tag == 'heading':
+                out.write('\n\n')
+            if elem is not root and elem.tail:
+                out.write(elem.tail)
+            continue
+        
+        if tag == 'file' or tag is None:
+            # Attachments are handled separately; comments/PIs carry no text
+            if elem.tail:
+                out.write(elem.tail)
+            continue
+        
+        if tag == 'link':
+            url = elem.get('href', '')
+            link_text = ''.join(elem.itertext()) or url
+            out.write(f'[{link_text}]({url})' if url else link_text)
+            if elem.tail:
+                out.write(elem.tail)
+            continue
+        
+        if tag in _XML_TAG_MARKERS:
+            out.write(_XML_TAG_MARKERS[tag][0])
+        elif tag == 'heading':
+            level = elem.get('level', '')
+            out.write('\n' + '#' * int(level) + ' ' if level.isdigit() else '\n## ')
+        # Any other tag (document wrapper, etc.) is dropped but its content kept
+        
+        if elem.text is None and len(elem) == 0 and elem is not root:
+            # Self-closing tag (e.g. <paragraph/>): opening marker only
+            if elem.tail:
+                out.write(elem.tail)
+            continue
+        
+        if elem.text:
+            out.write(elem.text)
+        stack.append((elem, False))
+        stack.extend((child, True) for child in reversed(elem))
+    
+    return out.getvalue()
+
+
+def _replace_xml_token(match: re.Match) -> str:
+    """Markdown replacement for one _RE_XML_TOKEN match."""
+    kind = match.lastgroup
+    
+    if kind == 'hlevel':
+        return '\n' + '#' * int(match.group('level')) + ' '
+    if kind == 'link':
+        # Extract URL and text; line breaks and entities inside the link
+        # are resolved as well since the outer pass skips over its body
+        link = _RE_BREAK.sub('\n', match.group(0))
+        href_match = _RE_LINK_HREF.search(link)
+        url = href_match.group(1) if href_match else ''
+        content_match = _RE_LINK_TEXT.search(link)
+        link_text = content_match.group(1) if content_match else url
+        markdown = f'[{link_text}]({url})' if url else link_text
+        return html.unescape(markdown)
+    if kind == 'ent':
+        return html.unescape(match.group(0))
+    return _XML_TOKEN_REPLACEMENTS[kind]
+
+
+def _xml_regex_to_text(xml_content: str) -> str:
+    """Convert EdStem XML to markdown-style text in one regex pass (fallback path)."""
+    return _RE_XML_TOKEN.sub(_replace_xml_token, xml_content)
+
+
 def convert_xml_to_formatted_text(xml_content: str) -> str:
     """
     Convert EdStem XML content to formatted text while preserving structure.
@@ -35,116 +204,171 @@ def convert_xml_to_formatted_text(xml_content: str) -> str:
     if not xml_content:
         return ""
     
-    import re
-    
-    # Remove document wrapper tags
-    text = xml_content.replace('<document version="2.0">', '').replace('</document>', '')
-    
-    # Handle file tags (remove them, attachments are handled separately)
-    text = re.sub(r'<file[^>]*/>', '', text)
-    
-    # Handle break tags -> line break
-    text = text.replace('<break/>', '\n')
-    text = text.replace('<break />', '\n')
-    
-    # Handle paragraph tags -> newline (but preserve content)
-    # Replace closing paragraph tags with newline first
-    text = text.replace('</paragraph>', '\n')
-    # Then remove opening paragraph tags
-    text = re.sub(r'<paragraph[^>]*>', '', text)
-    
-    # Handle list items -> bullet points
-    text = text.replace('</list-item>', '\n')
-    text = re.sub(r'<list-item[^>]*>', '• ', text)
-    
-    # Handle list tags (remove, but preserve structure)
-    text = text.replace('</list>', '\n')
-    text = re.sub(r'<list[^>]*>', '', text)
-    
-    # Handle blockquote tags -> indented block
-    text = text.replace('</blockquote>', '\n')
-    text = re.sub(r'<blockquote[^>]*>', '\n> ', text)
-    
-    # Handle heading tags -> bold headers
-    text = re.sub(r'</heading[^>]*>', '\n\n', text)
-    text = re.sub(r'<heading[^>]*level="(\d+)"[^>]*>', lambda m: '\n' + '#' * int(m.group(1)) + ' ', text)
-    text = re.sub(r'<heading[^>]*>', '\n## ', text)
-    
-    # Handle link tags -> extract URL and text
-    def replace_link(match):
-        href_match = re.search(r'href="([^"]+)"', match.group(0))
-        url = href_match.group(1) if href_match else ''
-        # Get text content between tags
-        content_match = re.search(r'>([^<]+)</link>', match.group(0))
-        link_text = content_match.group(1) if content_match else url
-        return f'[{link_text}]({url})' if url else link_text
-    
-    text = re.sub(r'<link[^>]*>.*?</link>', replace_link, text, flags=re.DOTALL)
-    
-    # Handle formatting tags (bold, italic, underline)
-    text = text.replace('</bold>', '**')
-    text = re.sub(r'<bold[^>]*>', '**', text)
-    
-    text = text.replace('</italic>', '*')
-    text = re.sub(r'<italic[^>]*>', '*', text)
-    
-    text = text.replace('</underline>', '__')
-    text = re.sub(r'<underline[^>]*>', '__', text)
-    
-    # Remove any remaining XML tags
-    text = re.sub(r'<[^>]+>', '', text)
-    
-    # Decode XML entities
-    text = text.replace('&amp;', '&')
-    text = text.replace('&lt;', '<')
-    text = text.replace('&gt;', '>')
-    text = text.replace('&quot;', '"')
-    text = text.replace('&apos;', "'")
-    
-    # Normalize whitespace: collapse multiple spaces but preserve newlines
-    # Replace multiple spaces with single space (but not newlines)
-    lines = text.split('\n')
-    normalized_lines = []
-    for line in lines:
-        # Collapse multiple spaces within a line
-        line = re.sub(r'[ \t]+', ' ', line)
-        # Remove trailing spaces
-        line = line.rstrip()
-        normalized_lines.append(line)
-    
-    # Join lines back, removing empty lines at the end
-    text = '\n'.join(normalized_lines)
+    # Plain text (most titles) has no tags or entities to convert
+    if '<' not in xml_content and '&' not in xml_content:
+        text = xml_content
+    else:
+        text = _xml_tree_to_text(xml_content)
+        if text is None:
+            text = _xml_regex_to_text(xml_content)
+    
+    # Normalize whitespace: collapse runs of spaces/tabs and strip trailing
+    # whitespace from every line, preserving newlines
+    text = _RE_WS.sub(' ', text)
+    text = _RE_TRAILING_WS.sub('', text)
     text = text.rstrip()
     
     return text
 
-def run_ingestion_pipeline(json_path: str = None, output_path: str = None):
+
+def _extract_urls(raw_content: str) -> Dict[str, Optional[str]]:
+    """
+    Find the first GitHub, website, and LinkedIn URL in raw post content.
+
+    Args:
+        raw_content: Raw EdStem XML content
+
+    Returns:
+        Dict with 'github_url', 'website_url', and 'linkedin_url' (None if absent)
+    """
+    urls = {'github_url': None, 'website_url': None, 'linkedin_url': None}
+    for match in _RE_URL.finditer(raw_content):
+        kind = match.lastgroup
+        url = match.group(0)
+        if urls[kind] is None:
+            urls[kind] = url
+        
+        # A website match like https://www.linkedin.com/in/... consumes the
+        # profile URL, so look inside it for the other kinds as well
+        if kind == 'website_url':
+            for inner_kind, pattern in (('github_url', _RE_GITHUB), ('linkedin_url', _RE_LINKEDIN)):
+                if urls[inner_kind] is None:
+                    inner = pattern.search(url)
+                    urls[inner_kind] = inner.group(0) if inner else None
+    
+    return urls
+
+
+def _load_raw_posts(json_path: Path) -> List[dict]:
+    """
+    Load raw EdStem posts from newline-delimited JSON (.jsonl) or a JSON array file.
+    An unterminated last .jsonl line (an append cut short by a crash) is skipped.
+
+    Args:
+        json_path: Path to the posts file
+
+    Returns:
+        List of raw post dicts
+    """
+    if json_path.suffix == '.jsonl':
+        posts = []
+        with open(json_path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    print(f"  Warning: Skipping unterminated last line of {json_path}")
+                    break
+                if line.strip():
+                    posts.append(orjson.loads(line))
+        return posts
+    return orjson.loads(json_path.read_bytes())
+
+
+def _process_one(raw_post: dict) -> Optional[dict]:
+    """
+    Clean one raw EdStem post and extract its metadata (Step 2 of the pipeline).
+    Module-level so ProcessPoolExecutor workers can pickle it.
+
+    Args:
+        raw_post: Post dict as loaded from ed_posts.jsonl
+
+    Returns:
+        Processed post dict, or None for the header post
+    """
+    # Skip the header post
+    if 'Extra Credit Opportunity' in raw_post.get('title', ''):
+        return None
+        
+    # Convert XML content to formatted text while preserving structure
+    content = raw_post.get('content', '')
+    content = convert_xml_to_formatted_text(content)
+    
+    title = raw_post.get('title', '')
+    title = convert_xml_to_formatted_text(title)
+        
+    # Extract basic metadata
+    post_data = {
+        'ed_post_id': raw_post['id'],
+        'ed_post_number': raw_post.get('number'),  # Sequential post number shown in UI
+        'title': title,
+        'content': content,
+        'author': raw_post['author'],
+        'date': raw_post['date'],
+        'attachment_urls': [att['url'] for att in raw_post.get('attachments_downloaded', [])],
+        'attachment_summaries': '',
+        'github_url': None,
+        'website_url': None,
+        'linkedin_url': None,
+        'num_reactions': 0,
+        'num_replies': 0
+    }
+    
+    # Extract URLs from content using basic regex (use raw content for URL extraction)
+    post_data.update(_extract_urls(raw_post['content']))
+    
+    # Process attachments (for now, just note we have them)
+    if post_data['attachment_urls']:
+        post_data['attachment_summaries'] = f"Attachments: {', '.join([att.get('original_filename', 'file') for att in raw_post.get('attachments_downloaded', [])])}"
+    
+    return post_data
+
+
+# Per-view accessors for the labels used to name a post's cluster,
+# excluding the catch-all 'other'/'Other' category
+_CLUSTER_LABEL_GETTERS = {
+    'topic': lambda post: post.get('topics', []),
+    'tool': lambda post: [label for label in post.get('tools', []) if label != 'other'],
+    'llm': lambda post: [label for label in post.get('llms', []) if label != 'Other'],
+}
+
+
+def run_ingestion_pipeline(
+    json_path: str = None,
+    output_path: str = None,
+    shared_layout_fit: bool = False,
+    embedding_cache_path: str = None
+):
     """
     Main ingestion pipeline - load JSON, process, generate embeddings, compute layouts.
     
     Args:
-        json_path: Path to ed_posts.json file. If None, uses default location in the backend directory.
+        json_path: Path to ed_posts.jsonl (one post per line) or a JSON array file.
+            If None, uses ed_posts.jsonl in the backend directory.
         output_path: Path to save processed_posts.json. If None, uses backend directory.
+        shared_layout_fit: Fit UMAP once on the content embeddings and transform each
+            view's embeddings, instead of fitting every view separately. Faster, but the
+            views share one manifold so their layouts differ less.
+        embedding_cache_path: .npz file of content embeddings from earlier runs, so only
+            new or edited posts are re-encoded. If None, uses backend directory.
     """
-    import json
     import numpy as np
-    from pathlib import Path
     
     # Default paths
     if json_path is None:
-        # Expect ed_posts.json to live in the backend directory
-        json_path = Path(__file__).parent.parent / 'ed_posts.json'
+        # Expect ed_posts.jsonl to live in the backend directory
+        json_path = Path(__file__).parent.parent / 'ed_posts.jsonl'
     
     if output_path is None:
         output_path = Path(__file__).parent.parent / 'processed_posts.json'
     
+    if embedding_cache_path is None:
+        embedding_cache_path = Path(__file__).parent.parent / 'embedding_cache.npz'
+    
     print("=" * 60)
     print("EECS 182 Post Graph - Data Ingestion Pipeline")
     print("=" * 60)
     
     print("\nStep 1: Loading posts from JSON...")
-    with open(json_path, 'r') as f:
-        raw_posts = json.load(f)
+    raw_posts = _load_raw_posts(Path(json_path))
     print(f"Found {len(raw_posts)} posts")
     
     # Initialize components
@@ -153,68 +377,24 @@ def run_ingestion_pipeline(json_path: str = None, output_path: str = None):
     graph_builder = GraphBuilder()
     
     print("\nStep 2: Processing posts...")
-    processed_posts = []
-    for raw_post in raw_posts:
-        # Skip the header post
-        if 'Extra Credit Opportunity' in raw_post.get('title', ''):
-            continue
-            
-        # Convert XML content to formatted text while preserving structure
-        import re
-        content = raw_post.get('content', '')
-        content = convert_xml_to_formatted_text(content)
-        
-        title = raw_post.get('title', '')
-        title = convert_xml_to_formatted_text(title)
-            
-        # Extract basic metadata
-        post_data = {
-            'ed_post_id': raw_post['id'],
-            'ed_post_number': raw_post.get('number'),  # Sequential post number shown in UI
-            'title': title,
-            'content': content,
-            'author': raw_post['author'],
-            'date': raw_post['date'],
-            'attachment_urls': [att['url'] for att in raw_post.get('attachments_downloaded', [])],
-            'attachment_summaries': '',
-            'github_url': None,
-            'website_url': None,
-            'linkedin_url': None,
-            'num_reactions': 0,
-            'num_replies': 0
-        }
-        
-        # Extract URLs from content using basic regex (use raw content for URL extraction)
-        raw_content = raw_post['content']
-        github = re.search(r'github\.com/[\w-]+(?:/[\w-]+)?', raw_content)
-        # Look for website URLs (excluding github, linkedin, edstem)
-        website = re.search(r'https?://(?!github\.com|linkedin\.com|edstem\.org)[\w.-]+\.[\w]+(?:/[\w.-]*)*', raw_content)
-        linkedin = re.search(r'linkedin\.com/in/[\w-]+', raw_content)
-        
-        post_data['github_url'] = github.group(0) if github else None
-        post_data['website_url'] = website.group(0) if website else None
-        post_data['linkedin_url'] = linkedin.group(0) if linkedin else None
-        
-        # Process attachments (for now, just note we have them)
-        if post_data['attachment_urls']:
-            post_data['attachment_summaries'] = f"Attachments: {', '.join([att.get('original_filename', 'file') for att in raw_post.get('attachments_downloaded', [])])}"
-        
-        processed_posts.append(post_data)
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        processed_posts = list(filter(None, executor.map(_process_one, raw_posts, chunksize=32)))
     
     print(f"Processed {len(processed_posts)} posts (excluding header)")
     
     print("\nStep 3: Categorizing posts (extracting course-aligned topics, tools, LLMs)...")
     for i, post in enumerate(processed_posts):
-        post['topics'] = categorizer.extract_topics(post['content'])
-        post['tools'] = categorizer.extract_tools(post['content'])
-        post['llms'] = categorizer.extract_llms(post['content'])
-        post['impressiveness_score'] = categorizer.calculate_impressiveness(post)
+        # Lowercase once and share it across the keyword extractors
+        lowered = post['content'].lower()
+        post['topics'] = categorizer.extract_topics(post['content'], lowered=lowered)
+        post['tools'], post['llms'] = categorizer.categorize(post['content'], lowered=lowered)
+    
+    scores = categorizer.calculate_impressiveness_batch(processed_posts)
+    for post, score in zip(processed_posts, scores.tolist()):
+        post['impressiveness_score'] = score
     
     print("\nStep 4: Generating embeddings...")
-    for i, post in enumerate(processed_posts):
-        if (i + 1) % 20 == 0:
-            print(f"  Generated embeddings for {i + 1}/{len(processed_posts)} posts")
-        embeddings = embedder.embed_post(post)
+    for post, embeddings in zip(processed_posts, embedder.embed_all(processed_posts, cache_path=str(embedding_cache_path))):
         post.update(embeddings)
     print(f"  Generated embeddings for {len(processed_posts)}/{len(processed_posts)} posts")
     
@@ -222,85 +402,87 @@ def run_ingestion_pipeline(json_path: str = None, output_path: str = None):
     layout_data = {}
     cluster_names_data = {}
     
-    for view_mode in ['topic', 'tool', 'llm']:
-        print(f"  Computing {view_mode} view...")
-        
-        # Get view-specific embeddings
-        emb_key = f'{view_mode}_view_embedding'
-        embeddings = np.array([p[emb_key] for p in processed_posts])
-        
-        # Compute layout
-        positions, clusters = graph_builder.compute_layout(embeddings, view_mode)
-        
-        # Store layout
-        for i, post in enumerate(processed_posts):
-            post[f'{view_mode}_layout'] = {
-                'x': float(positions[i][0]),
-                'y': float(positions[i][1]),
-                'cluster_id': int(clusters[i])
-            }
-        
-        # Compute cluster names by finding most common labels in each cluster
-        cluster_names = {}
-        unique_clusters = set(clusters)
-        from collections import Counter
+    view_modes = ['topic', 'tool', 'llm']
+    
+    # Gather each view's embeddings into one preallocated float32 matrix
+    n_posts = len(processed_posts)
+    dim = processed_posts[0]['topic_view_embedding'].shape[0]
+    view_embeddings = {view_mode: np.empty((n_posts, dim), dtype=np.float32) for view_mode in view_modes}
+    for i, post in enumerate(processed_posts):
+        for view_mode in view_modes:
+            view_embeddings[view_mode][i] = post[f'{view_mode}_view_embedding']
+    
+    # The views are independent and UMAP/HDBSCAN spend most of their time in
+    # GIL-releasing native code, so compute them concurrently. Each view gets
+    # its own GraphBuilder because fitting mutates the UMAP/HDBSCAN instances;
+    # a shared fitted builder runs its layouts one at a time instead
+    if shared_layout_fit:
+        shared_builder = GraphBuilder()
+        shared_builder.fit(np.stack([p['content_embedding'] for p in processed_posts]))
+        layout_builders = {view_mode: shared_builder for view_mode in view_modes}
+    else:
+        layout_builders = {view_mode: GraphBuilder() for view_mode in view_modes}
+    
+    layout_workers = 1 if shared_layout_fit else len(view_modes)
+    with ThreadPoolExecutor(max_workers=layout_workers) as layout_executor, \
+            ThreadPoolExecutor(max_workers=len(view_modes)) as executor:
+        layout_futures = {
+            view_mode: layout_executor.submit(
+                layout_builders[view_mode].compute_layout, view_embeddings[view_mode], view_mode
+            )
+            for view_mode in view_modes
+        }
+        similarity_futures = {
+            view_mode: executor.submit(graph_builder.compute_similarities, view_embeddings[view_mode])
+            for view_mode in view_modes
+        }
         
-        for cid in unique_clusters:
-            cid_int = int(cid)
-            if cid_int == -1:
-                cluster_names[cid_int] = "Uncategorized"
-                continue
-                
-            # Get all labels for posts in this cluster
-            cluster_posts = [processed_posts[i] for i, cluster_val in enumerate(clusters) if cluster_val == cid]
+        for view_mode in view_modes:
+            print(f"  Computing {view_mode} view...")
+            positions, clusters = layout_futures[view_mode].result()
             
-            if view_mode == 'topic':
-                labels = [label for p in cluster_posts for label in p.get('topics', [])]
-            elif view_mode == 'tool':
-                labels = [label for p in cluster_posts for label in p.get('tools', []) if label != 'other']
-            else: # llm
-                labels = [label for p in cluster_posts for label in p.get('llms', []) if label != 'Other']
+            # Store layout
+            for i, post in enumerate(processed_posts):
+                post[f'{view_mode}_layout'] = {
+                    'x': float(positions[i][0]),
+                    'y': float(positions[i][1]),
+                    'cluster_id': int(clusters[i])
+                }
             
-            if labels:
-                most_common = Counter(labels).most_common(1)[0][0]
-                cluster_names[cid_int] = most_common
-            else:
-                cluster_names[cid_int] = f"Cluster {cid_int}"
+            # Compute cluster names by finding most common labels in each cluster,
+            # counting every post's labels in a single pass
+            get_labels = _CLUSTER_LABEL_GETTERS[view_mode]
+            label_counters = defaultdict(Counter)
+            for post, cid in zip(processed_posts, clusters):
+                label_counters[int(cid)].update(get_labels(post))
         
-        cluster_names_data[view_mode] = cluster_names
+            cluster_names = {}
+            for cid in set(clusters):
+                cid_int = int(cid)
+                if cid_int == -1:
+                    cluster_names[cid_int] = "Uncategorized"
+                    continue
+            
+                counter = label_counters[cid_int]
+                cluster_names[cid_int] = counter.most_common(1)[0][0] if counter else f"Cluster {cid_int}"
         
-        # Compute similarities
-        similarities = graph_builder.compute_similarities(embeddings)
-        layout_data[f'{view_mode}_similarities'] = similarities
+            cluster_names_data[view_mode] = cluster_names
         
-        print(f"    Found {len(similarities)} edges above similarity threshold")
+            similarities = similarity_futures[view_mode].result()
+            layout_data[f'{view_mode}_similarities'] = similarities
+        
+            print(f"    Found {len(similarities)} edges above similarity threshold")
     
     print("\nStep 6: Saving processed data...")
     # output_path is now passed as parameter or set to backend/processed_posts.json
     
-    # Convert numpy arrays and int64 to native Python types for JSON serialization
-    for post in processed_posts:
-        for key in ['content_embedding', 'topic_view_embedding', 'tool_view_embedding', 'llm_view_embedding']:
-            if key in post:
-                post[key] = post[key].tolist()
-        
-        # Convert numpy int64 to int in layouts
-        for view_mode in ['topic', 'tool', 'llm']:
-            layout_key = f'{view_mode}_layout'
-            if layout_key in post:
-                post[layout_key]['cluster_id'] = int(post[layout_key]['cluster_id'])
-    
-    # Convert similarities to serializable format
-    for key in layout_data:
-        if key.endswith('_similarities'):
-            layout_data[key] = [(int(i), int(j), float(sim)) for i, j, sim in layout_data[key]]
-    
-    with open(output_path, 'w') as f:
-        json.dump({
+    # orjson serializes the numpy embeddings and similarity scalars directly
+    with open(output_path, 'wb') as f:
+        f.write(orjson.dumps({
             'posts': processed_posts,
             'layout_data': layout_data,
             'cluster_names': cluster_names_data
-        }, f, indent=2)
+        }, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
     
     print(f"Saved processed data to: {output_path}")
     
@@ -315,7 +497,6 @@ def run_ingestion_pipeline(json_path: str = None, output_path: str = None):
     all_tools = [tool for post in processed_posts for tool in post['tools']]
     all_llms = [llm for post in processed_posts for llm in post['llms']]
     
-    from collections import Counter
     tool_counts = Counter(all_tools)
     llm_counts = Counter(all_llms)
     
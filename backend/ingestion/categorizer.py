@@ -4,7 +4,24 @@ Extracts topics, tool types, and LLMs used from post content.
 """
 
 import re
-from typing import List, Dict
+from collections import Counter
+from typing import List, Dict, Optional, Tuple
+
+import ahocorasick
+import numpy as np
+
+# Precompiled patterns used to clean post content
+_RE_TAG = re.compile(r'<[^>]+>')
+_RE_SPACES = re.compile(r'\s+')
+
+
+def _is_boundary(text: str, i: int) -> bool:
+    """Whether text[i] is outside text or a non-word character (as regex \\b sees it)."""
+    if i < 0 or i >= len(text):
+        return True
+    ch = text[i]
+    return not (ch.isalnum() or ch == '_')
+
 
 class PostCategorizer:
     """Extract categories and compute quality scores for posts."""
@@ -153,45 +170,108 @@ class PostCategorizer:
             'Cursor': ['cursor'],
             'Other': []
         }
+        
+        # Single automaton over every tool and LLM keyword, so one scan of the
+        # lowercased content finds all matches (same substring semantics as `kw in s`)
+        self._keyword_automaton = ahocorasick.Automaton()
+        for kind, keyword_map in (('tool', self.tool_keywords), ('llm', self.llm_keywords)):
+            for label, keywords in keyword_map.items():
+                for kw in keywords:
+                    kw = kw.lower()
+                    if kw in self._keyword_automaton:
+                        self._keyword_automaton.get(kw).append((kind, label))
+                    else:
+                        self._keyword_automaton.add_word(kw, [(kind, label)])
+        self._keyword_automaton.make_automaton()
+        
+        # Automaton over the topic keywords, scanned against cleaned content.
+        # Values are (keyword, needs_word_boundary, topics); a keyword listed
+        # in several topics (or twice in one) counts once per listing
+        self._topic_automaton = ahocorasick.Automaton()
+        for topic, keywords in self.course_topics.items():
+            for kw in keywords:
+                kw = kw.lower()
+                if kw in self._topic_automaton:
+                    self._topic_automaton.get(kw)[2].append(topic)
+                else:
+                    self._topic_automaton.add_word(kw, (kw, len(kw) <= 3, [topic]))
+        self._topic_automaton.make_automaton()
     
-    def extract_topics(self, content: str, post_idx: int = None) -> List[str]:
+    def extract_topics(
+        self,
+        content: str,
+        post_idx: int = None,
+        lowered: Optional[str] = None
+    ) -> List[str]:
         """
         Extract course-aligned topic labels for a post using keyword matching.
         
         Args:
             content: Post content
             post_idx: Index of post (unused, kept for backwards compatibility)
+            lowered: content.lower(), if the caller already has it
             
         Returns:
             List of matched course topics
         """
+        if lowered is None:
+            lowered = content.lower()
+        
         # Clean content - remove HTML tags and normalize
-        clean_content = re.sub(r'<[^>]+>', ' ', content)
-        clean_content = re.sub(r'\s+', ' ', clean_content).strip().lower()
+        clean_content = _RE_TAG.sub(' ', lowered)
+        clean_content = _RE_SPACES.sub(' ', clean_content).strip()
         
-        detected_topics = []
-        topic_scores = {}
+        # Count non-overlapping occurrences of each keyword, as str.count would;
+        # short keywords must also sit on word boundaries to avoid false positives
+        topic_scores = Counter()
+        last_end = {}
+        for end, (keyword, needs_boundary, topics) in self._topic_automaton.iter(clean_content):
+            start = end - len(keyword) + 1
+            if start <= last_end.get(keyword, -1):
+                continue
+            if needs_boundary and not (
+                _is_boundary(clean_content, start - 1) and _is_boundary(clean_content, end + 1)
+            ):
+                continue
+            last_end[keyword] = end
+            for topic in topics:
+                topic_scores[topic] += 1
         
-        for topic, keywords in self.course_topics.items():
-            # Count keyword matches for this topic
-            match_count = 0
-            for keyword in keywords:
-                # Use word boundary matching for short keywords to avoid false positives
-                if len(keyword) <= 3:
-                    pattern = r'\b' + re.escape(keyword) + r'\b'
-                    matches = len(re.findall(pattern, clean_content, re.IGNORECASE))
-                else:
-                    matches = clean_content.count(keyword.lower())
-                match_count += matches
+        # Sort by match count and return top topics (max 3); ties keep the
+        # order of course_topics
+        sorted_topics = sorted(
+            (topic for topic in self.course_topics if topic_scores[topic]),
+            key=topic_scores.__getitem__,
+            reverse=True
+        )
+        return sorted_topics[:3]
+    
+    def categorize(self, content: str, lowered: Optional[str] = None) -> Tuple[List[str], List[str]]:
+        """
+        Extract tool types and LLMs used in one keyword scan.
+        
+        Args:
+            content: Post content
+            lowered: content.lower(), if the caller already has it
             
-            if match_count > 0:
-                topic_scores[topic] = match_count
+        Returns:
+            Tuple of (detected tool types, detected LLMs)
+        """
+        if lowered is None:
+            lowered = content.lower()
         
-        # Sort by match count and return top topics (max 3)
-        sorted_topics = sorted(topic_scores.items(), key=lambda x: x[1], reverse=True)
-        detected_topics = [topic for topic, score in sorted_topics[:3]]
+        matched = set()
+        for _, labels in self._keyword_automaton.iter(lowered):
+            matched.update(labels)
         
-        return detected_topics
+        # Keep the order of the keyword dictionaries
+        detected_tools = [tool for tool in self.tool_keywords if ('tool', tool) in matched]
+        detected_llms = [llm for llm in self.llm_keywords if ('llm', llm) in matched]
+        
+        return (
+            detected_tools if detected_tools else ['other'],
+            detected_llms if detected_llms else ['Other']
+        )
     
     def extract_tools(self, content: str) -> List[str]:
         """
@@ -203,14 +283,7 @@ class PostCategorizer:
         Returns:
             List of detected tool types
         """
-        content_lower = content.lower()
-        detected_tools = []
-        
-        for tool, keywords in self.tool_keywords.items():
-            if any(kw in content_lower for kw in keywords):
-                detected_tools.append(tool)
-        
-        return detected_tools if detected_tools else ['other']
+        return self.categorize(content)[0]
     
     def extract_llms(self, content: str) -> List[str]:
         """
@@ -222,16 +295,7 @@ class PostCategorizer:
         Returns:
             List of detected LLMs
         """
-        content_lower = content.lower()
-        detected_llms = []
-        
-        for llm, keywords in self.llm_keywords.items():
-            if llm == 'Other':
-                continue
-            if any(kw in content_lower for kw in keywords):
-                detected_llms.append(llm)
-        
-        return detected_llms if detected_llms else ['Other']
+        return self.categorize(content)[1]
     
     def calculate_impressiveness(self, post: Dict) -> float:
         """
@@ -249,15 +313,12 @@ class PostCategorizer:
         Returns:
             Impressiveness score (0-100+)
         """
-        score = 0.0
+        reactions = post.get('num_reactions', 0)
+        replies = post.get('num_replies', 0)
+        content = post.get('content') or ''
         
-        # Engagement
-        score += post.get('num_reactions', 0) * 2
-        score += post.get('num_replies', 0) * 1
-        
-        # Completeness - content length
-        content_length = len(post.get('content', ''))
-        score += min(content_length / 1000, 5)  # Max 5 points for length
+        # Engagement, plus completeness - max 5 points for content length
+        score = reactions * 2 + replies + min(len(content) / 1000, 5)
         
         # Has attachments
         if post.get('attachment_urls'):
@@ -267,4 +328,28 @@ class PostCategorizer:
         if post.get('github_url') or post.get('website_url'):
             score += 3
         
-        return score
+        return float(score)
+    
+    def calculate_impressiveness_batch(self, posts: List[Dict]) -> np.ndarray:
+        """
+        Score many posts at once; same formula as calculate_impressiveness.
+        
+        Args:
+            posts: List of post dictionaries
+            
+        Returns:
+            (N,) float64 array of impressiveness scores
+        """
+        n = len(posts)
+        reactions = np.fromiter((p.get('num_reactions', 0) for p in posts), dtype=np.int64, count=n)
+        replies = np.fromiter((p.get('num_replies', 0) for p in posts), dtype=np.int64, count=n)
+        lengths = np.fromiter((len(p.get('content') or '') for p in posts), dtype=np.int64, count=n)
+        has_attachments = np.fromiter((bool(p.get('attachment_urls')) for p in posts), dtype=bool, count=n)
+        has_links = np.fromiter(
+            (bool(p.get('github_url') or p.get('website_url')) for p in posts), dtype=bool, count=n
+        )
+        
+        return (
+            reactions * 2 + replies + np.minimum(lengths / 1000, 5.0)
+            + has_attachments * 5 + has_links * 3
+        )
@@ -4,8 +4,10 @@ Creates both content embeddings and view-specific embeddings for graph visualiza
 """
 
 from sentence_transformers import SentenceTransformer
+import hashlib
+import os
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 
 class PostEmbedder:
     """Generate embeddings for posts using SentenceTransformers."""
@@ -18,8 +20,13 @@ class PostEmbedder:
             model_name: Name of SentenceTransformer model to use
         """
         print(f"Loading embedding model: {model_name}...")
+        self.model_name = model_name
         self.model = SentenceTransformer(model_name)
         print("Model loaded successfully")
+        
+        # Embeddings of category label lists; only a handful of distinct
+        # combinations occur across all posts
+        self._category_cache: Dict[Tuple[str, ...], np.ndarray] = {}
     
     def embed_content(self, text: str) -> np.ndarray:
         """
@@ -37,7 +44,8 @@ class PostEmbedder:
         self, 
         content: str,
         categories: List[str],
-        alpha: float = 0.4
+        alpha: float = 0.4,
+        content_emb: Optional[np.ndarray] = None
     ) -> np.ndarray:
         """
         Fuse content and category embeddings to create view-specific embeddings.
@@ -50,17 +58,23 @@ class PostEmbedder:
             content: Post text content
             categories: List of category labels (e.g., ['RNN', 'Transformer'])
             alpha: Weight for category information (0-1). Higher = more category influence
+            content_emb: Precomputed embedding of content, to avoid re-encoding it
         
         Returns:
             Normalized fused embedding
         """
-        content_emb = self.embed_content(content)
+        if content_emb is None:
+            content_emb = self.embed_content(content)
         
         if not categories:
             return content_emb
         
-        category_text = " ".join(categories)
-        category_emb = self.embed_content(category_text)
+        # Keyed by the labels in order, since that order determines the text encoded
+        key = tuple(categories)
+        category_emb = self._category_cache.get(key)
+        if category_emb is None:
+            category_emb = self.embed_content(" ".join(categories))
+            self._category_cache[key] = category_emb
         
         # Weighted fusion
         fused = (1 - alpha) * content_emb + alpha * category_emb
@@ -87,16 +101,137 @@ class PostEmbedder:
         """
         # Combine content with attachment summaries
         full_content = post_data['content'] + " " + post_data.get('attachment_summaries', '')
+        content_emb = self.embed_content(full_content)
         
         return {
-            'content_embedding': self.embed_content(full_content),
+            'content_embedding': content_emb,
             'topic_view_embedding': self.create_view_specific_embedding(
-                full_content, post_data.get('topics', []), alpha
+                full_content, post_data.get('topics', []), alpha, content_emb
             ),
             'tool_view_embedding': self.create_view_specific_embedding(
-                full_content, post_data.get('tools', []), alpha
+                full_content, post_data.get('tools', []), alpha, content_emb
             ),
             'llm_view_embedding': self.create_view_specific_embedding(
-                full_content, post_data.get('llms', []), alpha
+                full_content, post_data.get('llms', []), alpha, content_emb
             )
         }
+    
+    def _load_content_cache(self, cache_path: str) -> Dict[str, np.ndarray]:
+        """
+        Load content embeddings saved by a previous embed_all run.
+        
+        Args:
+            cache_path: Path to the .npz cache file
+            
+        Returns:
+            Dictionary mapping content hash to embedding (empty if the file is
+            missing or was written by a different model)
+        """
+        if not os.path.exists(cache_path):
+            return {}
+        try:
+            with np.load(cache_path) as data:
+                if str(data['model']) != self.model_name:
+                    return {}
+                return dict(zip(data['keys'].tolist(), data['embeddings']))
+        except Exception as e:
+            print(f"  Warning: Could not read embedding cache {cache_path}: {e}")
+            return {}
+    
+    def _save_content_cache(self, cache_path: str, keys: List[str], embeddings: np.ndarray):
+        """
+        Save content embeddings for the next embed_all run (atomically replaced).
+        
+        Args:
+            cache_path: Path to the .npz cache file
+            keys: Content hash of each row
+            embeddings: (N, D) content embeddings
+        """
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, model=np.array(self.model_name), keys=np.array(keys), embeddings=embeddings)
+        os.replace(tmp_path, cache_path)
+    
+    def embed_all(
+        self,
+        posts: List[Dict],
+        alpha: float = 0.4,
+        batch_size: int = 64,
+        cache_path: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Generate all embeddings for many posts with a single batched encode.
+        
+        Produces the same embeddings as calling embed_post on each post, but
+        encodes every post's content and each distinct category string once.
+        With cache_path, content embeddings are looked up by a hash of the
+        embedded text, so only new or edited posts are encoded.
+        
+        Args:
+            posts: List of dictionaries containing post content and categories
+            alpha: Category influence weight
+            batch_size: Encode batch size
+            cache_path: Optional .npz file to reuse and save content embeddings
+            
+        Returns:
+            List of embedding dictionaries, one per post (same keys as embed_post)
+        """
+        n = len(posts)
+        full_contents = [p['content'] + " " + p.get('attachment_summaries', '') for p in posts]
+        keys = [hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest() for text in full_contents]
+        cached = self._load_content_cache(cache_path) if cache_path else {}
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        if cached:
+            print(f"  Reusing {n - len(missing)} cached content embeddings")
+        
+        category_texts = {
+            view_mode: [" ".join(p.get(key, [])) for p in posts]
+            for view_mode, key in (('topic', 'topics'), ('tool', 'tools'), ('llm', 'llms'))
+        }
+        unique_categories = list(dict.fromkeys(
+            text for texts in category_texts.values() for text in texts if text
+        ))
+        
+        texts = [full_contents[i] for i in missing] + unique_categories
+        dim = self.model.get_sentence_embedding_dimension()
+        encoded = self.model.encode(
+            texts,
+            batch_size=batch_size,
+            show_progress_bar=True,
+            normalize_embeddings=True,
+            convert_to_numpy=True
+        ) if texts else np.empty((0, dim), dtype=np.float32)
+        
+        content_embs = np.empty((n, dim), dtype=np.float32)
+        for i, key in enumerate(keys):
+            if key in cached:
+                content_embs[i] = cached[key]
+        content_embs[missing] = encoded[:len(missing)]
+        
+        if cache_path:
+            self._save_content_cache(cache_path, keys, content_embs)
+        
+        # One lookup table: content rows first, then distinct category strings
+        embs = np.concatenate([content_embs, encoded[len(missing):]])
+        category_row = {text: n + i for i, text in enumerate(unique_categories)}
+        
+        # Fuse all three views in one broadcast over a (views, N, D) stack.
+        # Posts without categories keep their content embedding, as in
+        # create_view_specific_embedding
+        view_modes = list(category_texts)
+        has_categories = np.array([[bool(text) for text in category_texts[v]] for v in view_modes])
+        category_embs = embs[np.array([
+            [category_row.get(text, i) for i, text in enumerate(category_texts[v])]
+            for v in view_modes
+        ])]
+        
+        fused = (1 - alpha) * content_embs[None, :, :] + alpha * category_embs
+        fused /= np.linalg.norm(fused, axis=-1, keepdims=True)
+        view_embs = np.where(has_categories[:, :, None], fused, content_embs[None, :, :])
+        
+        results = [{'content_embedding': content_embs[i]} for i in range(n)]
+        for v, view_mode in enumerate(view_modes):
+            for i in range(n):
+                results[i][f'{view_mode}_view_embedding'] = view_embs[v, i]
+        
+        return results
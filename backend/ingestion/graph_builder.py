@@ -5,7 +5,6 @@ Computes 2D positions and clusters for graph visualization.
 
 from umap import UMAP
 from hdbscan import HDBSCAN
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 from typing import List, Dict, Tuple
 
@@ -22,6 +21,21 @@ class GraphBuilder:
             random_state=42
         )
         self.clusterer = HDBSCAN(min_cluster_size=5, metric='euclidean')
+        # Set only by fit(); per-view fit_transform calls leave it False
+        self._fitted = False
+    
+    def fit(self, content_embeddings: np.ndarray) -> None:
+        """
+        Fit UMAP once so later compute_layout calls only transform.
+        
+        Use when the view embeddings are close to the content embeddings and
+        one shared manifold is acceptable for every view.
+        
+        Args:
+            content_embeddings: (N, D) array of content embeddings
+        """
+        self.umap.fit(np.ascontiguousarray(content_embeddings, dtype=np.float32))
+        self._fitted = True
     
     def compute_layout(
         self, 
@@ -32,6 +46,8 @@ class GraphBuilder:
         Compute 2D positions and clusters for graph visualization.
         
         Uses UMAP for dimensionality reduction to 2D, then HDBSCAN for clustering.
+        If fit() was called, UMAP transforms instead of refitting; otherwise each
+        call fits its own layout, regardless of earlier compute_layout calls.
         
         Args:
             embeddings: (N, D) array of embeddings
@@ -42,7 +58,11 @@ class GraphBuilder:
             clusters: (N,) array of cluster IDs
         """
         # Reduce to 2D using UMAP
-        positions = self.umap.fit_transform(embeddings)
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if self._fitted:
+            positions = self.umap.transform(embeddings)
+        else:
+            positions = self.umap.fit_transform(embeddings)
         
         # Cluster using HDBSCAN
         clusters = self.clusterer.fit_predict(positions)
@@ -68,34 +88,34 @@ class GraphBuilder:
         For each node, finds top-k most similar nodes above the threshold.
         
         Args:
-            embeddings: (N, D) array of embeddings
+            embeddings: (N, D) array of L2-normalized embeddings
             threshold: Minimum similarity to create an edge
             top_k: Number of most similar nodes to consider per node
         
         Returns:
             List of (post_i, post_j, similarity) tuples
         """
-        # Compute pairwise cosine similarities
-        similarities = cosine_similarity(embeddings)
-        edges = []
+        # Compute pairwise cosine similarities; PostEmbedder normalizes every
+        # embedding, so a float32 dot product is the cosine similarity
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        n = len(embeddings)
+        similarities = np.empty((n, n), dtype=np.float32)
+        np.matmul(embeddings, embeddings.T, out=similarities)
+        k = min(top_k, n - 1)
+        if k <= 0:
+            return []
         
-        for i in range(len(embeddings)):
-            # Get top-k most similar (excluding self)
-            sim_scores = similarities[i].copy()
-            sim_scores[i] = -1  # Exclude self
-            
-            # Get top-k indices
-            top_indices = np.argsort(sim_scores)[-top_k:]
-            
-            for j in top_indices:
-                if sim_scores[j] > threshold:
-                    edges.append((
-                        min(i, j),
-                        max(i, j),
-                        float(sim_scores[j])
-                    ))
+        # Get top-k most similar per row (excluding self) in one argpartition
+        np.fill_diagonal(similarities, -1)
+        top_indices = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        rows = np.repeat(np.arange(n), k)
+        cols = top_indices.reshape(-1)
+        keep = similarities[rows, cols] > threshold
         
-        # Remove duplicates (since we create edges from both directions)
-        edges = list(set(edges))
+        # Edges found from both directions collapse to one (min, max) pair
+        lo = np.minimum(rows[keep], cols[keep])
+        hi = np.maximum(rows[keep], cols[keep])
+        pairs = np.unique(lo * n + hi)
+        lo, hi = pairs // n, pairs % n
         
-        return edges
+        return list(zip(lo.tolist(), hi.tolist(), similarities[lo, hi].astype(float).tolist()))
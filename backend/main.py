@@ -3,15 +3,22 @@ FastAPI application for EECS 182 Post Graph API
 Provides endpoints for graph visualization, search, and data management
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional
+from fastapi.middleware.gzip import GZipMiddleware
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
+import asyncio
+import hashlib
 import os
 
-from database import SupabaseClient
+import numpy as np
+import orjson
+
+from database import get_client, POST_BATCH_SIZE
 from schemas import (
-    PostDetail, GraphData, SearchRequest, SearchResponse,
+    PostDetail, GraphNode, GraphData, SearchRequest, SearchResponse,
     StatsResponse, RefreshResponse, HealthResponse, ErrorResponse
 )
 
@@ -31,14 +38,136 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses (graph data and post lists are mostly text)
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 # Initialize database client
 try:
-    db = SupabaseClient()
+    db = get_client()
 except ValueError as e:
     print(f"Warning: Database client initialization failed: {e}")
     db = None
 
 
+def _field_defaults(model) -> Dict:
+    """Map a response model's fields to their defaults (None for required fields)"""
+    return {
+        name: None if field.is_required() else field.get_default(call_default_factory=True)
+        for name, field in model.model_fields.items()
+    }
+
+
+# Wire fields of the bulk response models. Rows from the database are trusted,
+# so large responses project onto these and serialize with orjson instead of
+# validating one model per row
+_GRAPH_NODE_DEFAULTS = _field_defaults(GraphNode)
+_POST_DETAIL_DEFAULTS = _field_defaults(PostDetail)
+
+
+def _project(row: Dict, defaults: Dict) -> Dict:
+    """Keep only a model's fields from a database row, filling in defaults"""
+    return {name: row.get(name, default) for name, default in defaults.items()}
+
+
+# Rows encoded per chunk when streaming a JSON array
+STREAM_CHUNK_ROWS = 200
+
+
+def _stream_json_array(rows: List[Dict], defaults: Dict) -> Iterator[bytes]:
+    """
+    Encode rows as a JSON array in chunks, so the whole body is never held at once
+    
+    Args:
+        rows: Database rows
+        defaults: Field defaults of the response model to project rows onto
+        
+    Yields:
+        Consecutive pieces of the JSON array
+    """
+    yield b'['
+    for start in range(0, len(rows), STREAM_CHUNK_ROWS):
+        chunk = b','.join(
+            orjson.dumps(_project(row, defaults))
+            for row in rows[start:start + STREAM_CHUNK_ROWS]
+        )
+        yield chunk if start == 0 else b',' + chunk
+    yield b']'
+
+
+# Decimal places kept on the wire. UMAP coordinates span tens of units, so
+# 2 places is well below a pixel; 3 places is finer than edge styling uses
+POSITION_DECIMALS = 2
+SIMILARITY_DECIMALS = 3
+
+
+def _round(value: Optional[float], ndigits: int) -> Optional[float]:
+    """Round a float for serialization, passing None through"""
+    return round(value, ndigits) if value is not None else None
+
+
+def _serialize_graph_data(data: Dict) -> bytes:
+    """
+    Serialize graph data in the GraphData wire format
+    
+    Args:
+        data: Graph data from SupabaseClient.get_graph_data
+        
+    Returns:
+        JSON-encoded body
+    """
+    nodes = []
+    for node in data['nodes']:
+        item = _project(node, _GRAPH_NODE_DEFAULTS)
+        item['x'] = _round(item['x'], POSITION_DECIMALS)
+        item['y'] = _round(item['y'], POSITION_DECIMALS)
+        nodes.append(item)
+    # Edges outnumber nodes; round all similarities in one vectorized pass
+    raw_edges = data['edges']
+    similarities = np.round(
+        np.fromiter((edge['similarity'] for edge in raw_edges), dtype=np.float64, count=len(raw_edges)),
+        SIMILARITY_DECIMALS
+    ).tolist()
+    edges = [
+        {'source': edge['source'], 'target': edge['target'], 'similarity': similarity}
+        for edge, similarity in zip(raw_edges, similarities)
+    ]
+    return orjson.dumps(
+        {'nodes': nodes, 'edges': edges, 'cluster_names': data.get('cluster_names')},
+        option=orjson.OPT_NON_STR_KEYS
+    )
+
+
+# Serialized graph-data responses: view_mode -> (data version, ETag, body).
+# An entry is reused only while the database's data version is unchanged,
+# so writes from any process (run_ingestion.py, other workers) replace it
+_graph_cache: Dict[str, Tuple[int, str, bytes]] = {}
+
+
+def _load_graph_response(view_mode: str) -> Tuple[str, bytes]:
+    """
+    Get the serialized graph-data body and its ETag, building it on a miss
+    
+    Args:
+        view_mode: View mode ('topic', 'tool', or 'llm')
+        
+    Returns:
+        Tuple of (ETag, JSON body)
+    """
+    version = db.data_version()
+    entry = _graph_cache.get(view_mode)
+    if entry is not None and entry[0] == version:
+        return entry[1], entry[2]
+    
+    body = _serialize_graph_data(db.get_graph_data(view_mode))
+    if version is None:
+        # No version to key on; fall back to a content hash and skip the local layer
+        return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"', body
+    
+    etag = f'"v{version}-{view_mode}"'
+    _graph_cache[view_mode] = (version, etag, body)
+    return etag, body
+
+
 # Health check endpoint
 @app.get("/", response_model=HealthResponse)
 async def root():
@@ -61,7 +190,7 @@ async def health_check():
     
     try:
         # Test database connection
-        stats = db.get_stats()
+        stats = await asyncio.to_thread(db.get_stats)
         return {
             "status": "healthy",
             "message": f"API running with {stats['posts']} posts in database",
@@ -76,10 +205,15 @@ async def health_check():
 
 # Posts endpoints
 @app.get("/api/posts", response_model=List[PostDetail])
-async def get_all_posts():
+async def get_all_posts(
+    limit: Optional[int] = Query(None, ge=1, description="Max posts to return")
+):
     """
     Get all posts
     
+    Args:
+        limit: Optional cap on the number of posts returned
+    
     Returns:
         List of all posts with full details
     """
@@ -87,8 +221,15 @@ async def get_all_posts():
         raise HTTPException(status_code=503, detail="Database not available")
     
     try:
-        posts = db.get_all_posts()
-        return posts
+        # The Supabase client is synchronous; run it off the event loop
+        posts = await asyncio.to_thread(db.get_all_posts)
+        if limit is not None:
+            posts = posts[:limit]
+        # Sync generator, so Starlette encodes the chunks in its threadpool
+        return StreamingResponse(
+            _stream_json_array(posts, _POST_DETAIL_DEFAULTS),
+            media_type="application/json"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -111,7 +252,7 @@ async def get_post(post_id: int):
         raise HTTPException(status_code=503, detail="Database not available")
     
     try:
-        post = db.get_post_by_id(post_id)
+        post = await asyncio.to_thread(db.get_post_by_id, post_id)
         if not post:
             raise HTTPException(status_code=404, detail="Post not found")
         return post
@@ -126,10 +267,12 @@ async def get_post(post_id: int):
 
 # Graph data endpoint
 @app.get("/api/graph-data/{view_mode}", response_model=GraphData)
-async def get_graph_data(view_mode: str):
+async def get_graph_data(view_mode: str, request: Request):
     """
     Get graph data for visualization
     
+    Responses carry an ETag; a matching If-None-Match gets 304 Not Modified.
+    
     Args:
         view_mode: View mode ('topic', 'tool', or 'llm')
         
@@ -147,8 +290,10 @@ async def get_graph_data(view_mode: str):
         )
     
     try:
-        data = db.get_graph_data(view_mode)
-        return data
+        etag, body = await asyncio.to_thread(_load_graph_response, view_mode)
+        if request.headers.get('if-none-match') == etag:
+            return Response(status_code=304, headers={'ETag': etag})
+        return Response(content=body, media_type="application/json", headers={'ETag': etag})
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -156,6 +301,39 @@ async def get_graph_data(view_mode: str):
         )
 
 
+@app.get("/api/graph-data/{view_mode}/edges.bin")
+async def get_graph_edges_binary(view_mode: str):
+    """
+    Get the graph edges as packed binary records
+    
+    Each edge is 12 bytes, little-endian: int32 source, int32 target,
+    float32 similarity. Smaller and faster to decode than the JSON edges.
+    
+    Args:
+        view_mode: View mode ('topic', 'tool', or 'llm')
+        
+    Returns:
+        application/octet-stream body of packed edge records
+    """
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+    
+    if view_mode not in ['topic', 'tool', 'llm']:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid view_mode. Must be 'topic', 'tool', or 'llm'"
+        )
+    
+    try:
+        content = await asyncio.to_thread(db.get_graph_edges_binary, view_mode)
+        return Response(content=content, media_type="application/octet-stream")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to fetch graph edges: {str(e)}"
+        )
+
+
 # Search endpoint
 @app.post("/api/search", response_model=SearchResponse)
 async def search_posts(request: SearchRequest):
@@ -172,7 +350,8 @@ async def search_posts(request: SearchRequest):
         raise HTTPException(status_code=503, detail="Database not available")
     
     try:
-        results = db.search_posts(
+        results = await asyncio.to_thread(
+            db.search_posts,
             query=request.query,
             view_mode=request.view_mode,
             limit=request.limit
@@ -222,7 +401,7 @@ async def get_stats():
         raise HTTPException(status_code=503, detail="Database not available")
     
     try:
-        stats = db.get_stats()
+        stats = await asyncio.to_thread(db.get_stats)
         return {
             **stats,
             "view_modes": ["topic", "tool", "llm"]
@@ -270,29 +449,30 @@ async def trigger_refresh(background_tasks: BackgroundTasks):
             
             print(f"Loading {len(posts)} posts into database...")
             
-            # Insert posts
-            for i, post in enumerate(posts):
+            # Insert posts in bulk upserts, collecting their database IDs
+            id_map = {}
+            for start in range(0, len(posts), POST_BATCH_SIZE):
+                batch = posts[start:start + POST_BATCH_SIZE]
                 try:
-                    db.insert_post(post)
-                    if (i + 1) % 10 == 0:
-                        print(f"  Inserted {i + 1}/{len(posts)} posts")
+                    id_map.update(db.insert_posts_bulk(batch))
+                    print(f"  Inserted {start + len(batch)}/{len(posts)} posts")
                 except Exception as e:
-                    print(f"  Error inserting post {post.get('ed_post_id')}: {e}")
+                    print(f"  Error inserting posts {start + 1}-{start + len(batch)}: {e}")
             
-            # Insert similarities
+            # Insert similarities (edges index into posts)
             print("Loading similarities...")
+            ed_post_ids = [post['ed_post_id'] for post in posts]
             for view_mode in ['topic', 'tool', 'llm']:
                 similarities = layout_data.get(f'{view_mode}_similarities', [])
                 print(f"  Loading {len(similarities)} {view_mode} similarities...")
                 
-                for i, (idx1, idx2, sim) in enumerate(similarities):
-                    try:
-                        post_id_1 = posts[idx1]['ed_post_id']
-                        post_id_2 = posts[idx2]['ed_post_id']
-                        db.insert_similarity(post_id_1, post_id_2, view_mode, sim)
-                    except Exception as e:
-                        if i < 5:  # Only print first few errors
-                            print(f"    Error inserting similarity: {e}")
+                edges = [(ed_post_ids[idx1], ed_post_ids[idx2], sim) for idx1, idx2, sim in similarities]
+                try:
+                    written = db.insert_similarities_bulk(edges, view_mode, id_map)
+                    print(f"    Inserted {written}/{len(similarities)} {view_mode} similarities")
+                except Exception as e:
+                    # BulkWriteError messages include how many rows were written
+                    print(f"    Error inserting {view_mode} similarities: {e}")
             
             print("Database refresh complete!")
             
@@ -0,0 +1,17 @@
+-- One layout row per post and view mode.
+-- Lets layouts be written with a single upsert (on_conflict='post_id,view_mode')
+-- instead of a delete + insert per row.
+--
+-- Superseded by 008_posts_layouts_jsonb.sql, which moves layouts into
+-- posts.layouts and drops graph_layouts (and this constraint with it).
+-- Kept so 002-007, which still reference graph_layouts, apply in order.
+
+-- Drop any duplicate layouts left behind by the old delete + insert pattern
+DELETE FROM graph_layouts a
+USING graph_layouts b
+WHERE a.post_id = b.post_id
+  AND a.view_mode = b.view_mode
+  AND a.id < b.id;
+
+ALTER TABLE graph_layouts
+    ADD CONSTRAINT graph_layouts_post_id_view_mode_key UNIQUE (post_id, view_mode);
@@ -0,0 +1,38 @@
+-- Store embeddings as half-precision vectors (requires pgvector >= 0.7).
+-- all-MiniLM-L6-v2 produces 384-dimensional embeddings. The client sends
+-- them as compact pgvector text literals (see database.format_vector).
+
+ALTER TABLE posts
+    ALTER COLUMN content_embedding TYPE halfvec(384) USING content_embedding::halfvec(384),
+    ALTER COLUMN topic_view_embedding TYPE halfvec(384) USING topic_view_embedding::halfvec(384),
+    ALTER COLUMN tool_view_embedding TYPE halfvec(384) USING tool_view_embedding::halfvec(384),
+    ALTER COLUMN llm_view_embedding TYPE halfvec(384) USING llm_view_embedding::halfvec(384);
+
+-- Semantic search RPC used by SupabaseClient.search_posts
+DROP FUNCTION IF EXISTS match_posts(vector, float, int, text);
+
+CREATE OR REPLACE FUNCTION match_posts(
+    query_embedding halfvec(384),
+    match_threshold float,
+    match_count int,
+    view_column text DEFAULT 'content_embedding'
+)
+RETURNS TABLE (id bigint, similarity float)
+LANGUAGE plpgsql STABLE
+AS $$
+BEGIN
+    IF view_column NOT IN ('content_embedding', 'topic_view_embedding',
+                           'tool_view_embedding', 'llm_view_embedding') THEN
+        RAISE EXCEPTION 'Invalid view_column: %', view_column;
+    END IF;
+
+    RETURN QUERY EXECUTE format(
+        'SELECT p.id::bigint, (1 - (p.%1$I <=> $1))::float AS similarity
+         FROM posts p
+         WHERE 1 - (p.%1$I <=> $1) > $2
+         ORDER BY p.%1$I <=> $1
+         LIMIT $3',
+        view_column
+    ) USING query_embedding, match_threshold, match_count;
+END;
+$$;
@@ -0,0 +1,14 @@
+-- Full-text search over title, content and author.
+-- Replaces the ILIKE '%query%' filter in SupabaseClient.search_posts,
+-- which had to scan every row.
+
+ALTER TABLE posts
+    ADD COLUMN IF NOT EXISTS search_tsv tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector(
+            'english',
+            coalesce(title, '') || ' ' || coalesce(content, '') || ' ' || coalesce(author, '')
+        )
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS posts_search_tsv_idx ON posts USING GIN (search_tsv);
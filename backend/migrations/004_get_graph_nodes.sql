@@ -0,0 +1,19 @@
+-- Graph nodes for one view mode in a single call.
+-- Joins posts with their graph_layouts row and drops the large embedding
+-- and search columns, so SupabaseClient.get_graph_data no longer fetches
+-- both tables and joins them in Python.
+
+CREATE OR REPLACE FUNCTION get_graph_nodes(view_mode text)
+RETURNS SETOF jsonb
+LANGUAGE sql STABLE
+AS $$
+    SELECT (to_jsonb(p)
+            - 'content_embedding' - 'topic_view_embedding'
+            - 'tool_view_embedding' - 'llm_view_embedding'
+            - 'search_tsv')
+           || jsonb_build_object('x', l.x, 'y', l.y, 'cluster_id', l.cluster_id)
+    FROM posts p
+    JOIN graph_layouts l ON l.post_id = p.id
+    WHERE l.view_mode = get_graph_nodes.view_mode
+    ORDER BY p.id;
+$$;
@@ -0,0 +1,13 @@
+-- Row counts for the stats endpoint in one call.
+-- SupabaseClient.get_stats used to download every id of all three
+-- tables just to count them with len() in Python.
+
+CREATE OR REPLACE FUNCTION get_table_counts()
+RETURNS TABLE (posts bigint, layouts bigint, similarities bigint)
+LANGUAGE sql STABLE
+AS $$
+    SELECT
+        (SELECT count(*) FROM posts),
+        (SELECT count(*) FROM graph_layouts),
+        (SELECT count(*) FROM post_similarities);
+$$;
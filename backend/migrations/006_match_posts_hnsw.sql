@@ -0,0 +1,77 @@
+-- One vector search RPC per embedding column, each backed by an HNSW index.
+-- The single match_posts(view_column) function built its query with
+-- dynamic SQL, so the planner could not use a per-column index.
+
+DROP FUNCTION IF EXISTS match_posts(halfvec, float, int, text);
+
+CREATE INDEX IF NOT EXISTS posts_content_embedding_hnsw_idx ON posts
+    USING hnsw (content_embedding halfvec_cosine_ops) WITH (m = 16, ef_construction = 64);
+
+CREATE OR REPLACE FUNCTION match_posts_content(
+    query_embedding halfvec(384),
+    match_threshold float,
+    match_count int
+)
+RETURNS TABLE (id bigint, similarity float)
+LANGUAGE sql STABLE
+AS $$
+    SELECT p.id::bigint, (1 - (p.content_embedding <=> query_embedding))::float AS similarity
+    FROM posts p
+    WHERE (1 - (p.content_embedding <=> query_embedding)) > match_threshold
+    ORDER BY p.content_embedding <=> query_embedding
+    LIMIT match_count;
+$$;
+
+CREATE INDEX IF NOT EXISTS posts_topic_view_embedding_hnsw_idx ON posts
+    USING hnsw (topic_view_embedding halfvec_cosine_ops) WITH (m = 16, ef_construction = 64);
+
+CREATE OR REPLACE FUNCTION match_posts_topic(
+    query_embedding halfvec(384),
+    match_threshold float,
+    match_count int
+)
+RETURNS TABLE (id bigint, similarity float)
+LANGUAGE sql STABLE
+AS $$
+    SELECT p.id::bigint, (1 - (p.topic_view_embedding <=> query_embedding))::float AS similarity
+    FROM posts p
+    WHERE (1 - (p.topic_view_embedding <=> query_embedding)) > match_threshold
+    ORDER BY p.topic_view_embedding <=> query_embedding
+    LIMIT match_count;
+$$;
+
+CREATE INDEX IF NOT EXISTS posts_tool_view_embedding_hnsw_idx ON posts
+    USING hnsw (tool_view_embedding halfvec_cosine_ops) WITH (m = 16, ef_construction = 64);
+
+CREATE OR REPLACE FUNCTION match_posts_tool(
+    query_embedding halfvec(384),
+    match_threshold float,
+    match_count int
+)
+RETURNS TABLE (id bigint, similarity float)
+LANGUAGE sql STABLE
+AS $$
+    SELECT p.id::bigint, (1 - (p.tool_view_embedding <=> query_embedding))::float AS similarity
+    FROM posts p
+    WHERE (1 - (p.tool_view_embedding <=> query_embedding)) > match_threshold
+    ORDER BY p.tool_view_embedding <=> query_embedding
+    LIMIT match_count;
+$$;
+
+CREATE INDEX IF NOT EXISTS posts_llm_view_embedding_hnsw_idx ON posts
+    USING hnsw (llm_view_embedding halfvec_cosine_ops) WITH (m = 16, ef_construction = 64);
+
+CREATE OR REPLACE FUNCTION match_posts_llm(
+    query_embedding halfvec(384),
+    match_threshold float,
+    match_count int
+)
+RETURNS TABLE (id bigint, similarity float)
+LANGUAGE sql STABLE
+AS $$
+    SELECT p.id::bigint, (1 - (p.llm_view_embedding <=> query_embedding))::float AS similarity
+    FROM posts p
+    WHERE (1 - (p.llm_view_embedding <=> query_embedding)) > match_threshold
+    ORDER BY p.llm_view_embedding <=> query_embedding
+    LIMIT match_count;
+$$;
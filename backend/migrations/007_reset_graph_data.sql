@@ -0,0 +1,12 @@
+-- Clear all graph data in a single call.
+-- Replaces three filtered DELETEs (neq('id', 0)) in
+-- SupabaseClient.clear_all_data, which each scanned their table.
+-- Sequences are left alone (no RESTART IDENTITY) so post ids are never
+-- reused; a reused id would resolve stale cached ids to different posts.
+
+CREATE OR REPLACE FUNCTION reset_graph_data()
+RETURNS void
+LANGUAGE sql
+AS $$
+    TRUNCATE post_similarities, graph_layouts, posts CASCADE;
+$$;
@@ -0,0 +1,54 @@
+-- Store each post's three view layouts in a JSONB column on posts:
+--   {"topic": {"x": .., "y": .., "cluster_id": ..}, "tool": {...}, "llm": {...}}
+-- Posts and layouts are now written in one upsert, and graph nodes are
+-- read without a join. Supersedes 001_graph_layouts_unique.sql.
+
+ALTER TABLE posts ADD COLUMN IF NOT EXISTS layouts jsonb NOT NULL DEFAULT '{}';
+
+-- Backfill from the old table
+UPDATE posts p
+SET layouts = l.layouts
+FROM (
+    SELECT post_id,
+           jsonb_object_agg(
+               view_mode,
+               jsonb_build_object('x', x, 'y', y, 'cluster_id', cluster_id)
+           ) AS layouts
+    FROM graph_layouts
+    GROUP BY post_id
+) l
+WHERE l.post_id = p.id;
+
+CREATE OR REPLACE FUNCTION get_graph_nodes(view_mode text)
+RETURNS SETOF jsonb
+LANGUAGE sql STABLE
+AS $$
+    SELECT (to_jsonb(p)
+            - 'content_embedding' - 'topic_view_embedding'
+            - 'tool_view_embedding' - 'llm_view_embedding'
+            - 'search_tsv' - 'layouts')
+           || (p.layouts -> get_graph_nodes.view_mode)
+    FROM posts p
+    WHERE p.layouts ? get_graph_nodes.view_mode
+    ORDER BY p.id;
+$$;
+
+-- Layout count is now the number of view entries across all posts
+CREATE OR REPLACE FUNCTION get_table_counts()
+RETURNS TABLE (posts bigint, layouts bigint, similarities bigint)
+LANGUAGE sql STABLE
+AS $$
+    SELECT
+        (SELECT count(*) FROM posts),
+        (SELECT coalesce(sum((SELECT count(*) FROM jsonb_object_keys(layouts))), 0)::bigint FROM posts),
+        (SELECT count(*) FROM post_similarities);
+$$;
+
+CREATE OR REPLACE FUNCTION reset_graph_data()
+RETURNS void
+LANGUAGE sql
+AS $$
+    TRUNCATE post_similarities, posts CASCADE;
+$$;
+
+DROP TABLE graph_layouts;
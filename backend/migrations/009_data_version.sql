@@ -0,0 +1,40 @@
+-- Version counter for the graph data, bumped by every write to posts or
+-- post_similarities (including TRUNCATE) from any process.
+-- API processes compare it against the version their in-memory caches
+-- were built from, so data loaded by run_ingestion.py / db_utils.py in
+-- another process is picked up without waiting for cache TTLs.
+
+CREATE TABLE IF NOT EXISTS data_version (
+    id int PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version bigint NOT NULL DEFAULT 0
+);
+
+INSERT INTO data_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_data_version()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE id = 1;
+    RETURN NULL;
+END;
+$$;
+
+-- Statement-level, so a bulk upsert bumps the version once
+DROP TRIGGER IF EXISTS posts_bump_data_version ON posts;
+CREATE TRIGGER posts_bump_data_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON posts
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+
+DROP TRIGGER IF EXISTS post_similarities_bump_data_version ON post_similarities;
+CREATE TRIGGER post_similarities_bump_data_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON post_similarities
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+
+CREATE OR REPLACE FUNCTION get_data_version()
+RETURNS bigint
+LANGUAGE sql STABLE
+AS $$
+    SELECT version FROM data_version WHERE id = 1;
+$$;
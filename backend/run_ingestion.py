@@ -4,29 +4,120 @@ Standalone script to fetch latest Ed posts and run the data ingestion pipeline.
 
 By default this script will:
   1. Use the Ed webscraper to fetch the latest participation posts.
-  2. Append only *new* posts (by Ed thread `id`) to backend/ed_posts.json.
+  2. Append only *new* posts (by Ed thread `id`) to backend/ed_posts.jsonl.
   3. Run the ingestion pipeline to generate backend/processed_posts.json.
 """
 
+import os
 import sys
 from pathlib import Path
+from typing import Dict, List, Set
+
+import orjson
 
 # Add backend to path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from ingestion import run_ingestion_pipeline
 
+# Bytes read per step when scanning back for the archive's last newline
+TAIL_SCAN_BYTES = 64 * 1024
+
+
+def _id_index_path(json_path: Path) -> Path:
+    """Sidecar file listing the Ed thread id of every post in json_path, one per line"""
+    return json_path.parent / 'ed_post_ids.txt'
+
+
+def load_existing_ids(json_path: Path) -> Set[int]:
+    """
+    Collect the Ed thread ids in ed_posts.jsonl
+
+    Reads the ed_post_ids.txt index when it is at least as new as the archive
+    and its last id was written completely; otherwise scans the archive one
+    line at a time and rebuilds the index. An unterminated last archive line
+    (an append cut short by a crash) is skipped; append_posts drops it before
+    the next append.
+
+    Args:
+        json_path: Path to ed_posts.jsonl
+
+    Returns:
+        Set of post ids
+    """
+    index_path = _id_index_path(json_path)
+    if index_path.exists() and index_path.stat().st_mtime >= json_path.stat().st_mtime:
+        index_text = index_path.read_text()
+        if index_text.endswith('\n') or not index_text:
+            return {int(post_id) for post_id in index_text.split()}
+
+    ids = set()
+    with open(json_path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                print(f"  Warning: Skipping unterminated last line of {json_path}")
+                break
+            if line.strip():
+                ids.add(orjson.loads(line)['id'])
+    index_path.write_text(''.join(f'{post_id}\n' for post_id in ids))
+    return ids
+
+
+def _drop_torn_tail(json_path: Path) -> None:
+    """
+    Truncate ed_posts.jsonl after its last newline, dropping a line left
+    unterminated by an interrupted append
+
+    Args:
+        json_path: Path to ed_posts.jsonl
+    """
+    with open(json_path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        # Scan back in blocks for the last newline
+        while pos > 0:
+            start = max(0, pos - TAIL_SCAN_BYTES)
+            f.seek(start)
+            block = f.read(pos - start)
+            newline = block.rfind(b'\n')
+            if newline != -1:
+                pos = start + newline + 1
+                break
+            pos = start
+        if pos < end:
+            print(f"  Warning: Dropping {end - pos} bytes of an unterminated last line from {json_path}")
+            f.truncate(pos)
+
+
+def append_posts(json_path: Path, new_posts: List[Dict]) -> None:
+    """
+    Append posts to ed_posts.jsonl in a single write, and their ids to the index
+
+    The archive is newline-delimited JSON, so the cost is proportional to the
+    new posts rather than the whole archive. The archive is fsynced before the
+    index is written, so the index never lists a post the archive may lack.
+
+    Args:
+        json_path: Path to ed_posts.jsonl
+        new_posts: Posts to append
+    """
+    if json_path.exists():
+        _drop_torn_tail(json_path)
+
+    with open(json_path, 'ab') as f:
+        f.write(b''.join(orjson.dumps(post, option=orjson.OPT_APPEND_NEWLINE) for post in new_posts))
+        f.flush()
+        os.fsync(f.fileno())
+
+    # Written after the archive so the index's mtime marks it as up to date
+    with open(_id_index_path(json_path), 'a') as f:
+        f.write(''.join(f"{post['id']}\n" for post in new_posts))
+        f.flush()
+        os.fsync(f.fileno())
+
 
 if __name__ == "__main__":
     import argparse
-    import json
-
-    # Import webscraper lazily so this script still works even if Ed env vars
-    # are not configured. We only use it when scraping is enabled.
-    try:
-        import webscraper
-    except ImportError:
-        webscraper = None
     
     parser = argparse.ArgumentParser(description='Run EECS 182 post ingestion pipeline')
     parser.add_argument(
@@ -40,15 +131,36 @@ if __name__ == "__main__":
         action='store_true',
         help='Skip fetching latest Ed posts with the webscraper before ingestion'
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=16,
+        help='Number of concurrent attachment downloads while scraping (default: 16)'
+    )
+    parser.add_argument(
+        '--shared-layout-fit',
+        action='store_true',
+        help='Fit UMAP once on content embeddings and transform each view (faster, less view-specific layouts)'
+    )
     
     args = parser.parse_args()
 
+    # Import webscraper lazily so this script still works even if Ed env vars
+    # are not configured. We only use it when scraping is enabled, which also
+    # keeps its HTTP/PDF imports off the --skip-scrape startup path.
+    webscraper = None
+    if not args.skip_scrape:
+        try:
+            import webscraper
+        except ImportError:
+            webscraper = None
+
     # Resolve input JSON path
     backend_dir = Path(__file__).parent
-    json_path = backend_dir / "ed_posts.json"
+    json_path = backend_dir / "ed_posts.jsonl"
 
     # Optionally fetch latest posts from Ed and append only new ones
-    if not args.skip_scrape and webscraper is not None and json_path == backend_dir / "ed_posts.json":
+    if not args.skip_scrape and webscraper is not None and json_path == backend_dir / "ed_posts.jsonl":
         ED_API_TOKEN = getattr(webscraper, "ED_API_TOKEN", None)
         ED_COURSE_ID = getattr(webscraper, "ED_COURSE_ID", None)
         SEARCH_STRING = getattr(webscraper, "SEARCH_STRING", None)
@@ -58,46 +170,52 @@ if __name__ == "__main__":
         else:
             print("\nStep 0: Fetching latest Ed posts via webscraper...")
 
-            # Load existing posts, if any
-            existing_posts = []
+            # Collect the ids of existing posts from the id index (or the archive).
+            # If they can't be read, skip the scrape rather than treating every
+            # thread as new and appending duplicates
+            existing_ids = set()
             if json_path.exists():
                 try:
-                    with open(json_path, 'r', encoding='utf-8') as f:
-                        existing_posts = json.load(f)
-                    print(f"  Loaded {len(existing_posts)} existing posts from {json_path}")
+                    existing_ids = load_existing_ids(json_path)
+                    print(f"  Loaded {len(existing_ids)} existing post ids from {json_path}")
                 except Exception as e:
-                    print(f"  Warning: Could not load existing {json_path}: {e}")
-                    existing_posts = []
-
-            existing_ids = {post.get('id') for post in existing_posts}
+                    print(f"  Error: Could not load existing post ids from {json_path}: {e}")
+                    print("  Skipping Ed scrape; ingesting the existing archive as is.")
+                    existing_ids = None
 
-            # Fetch latest matching posts from Ed
-            try:
-                scraped_posts = webscraper.process_threads(SEARCH_STRING)
-            except Exception as e:
-                print(f"  Error while scraping Ed posts: {e}")
-                scraped_posts = []
-
-            # Keep only posts whose Ed thread id we haven't seen before
-            new_posts = [p for p in scraped_posts if p.get('id') not in existing_ids]
-
-            if new_posts:
-                print(f"  Found {len(new_posts)} new posts (out of {len(scraped_posts)} matching).")
-                existing_posts.extend(new_posts)
+            if existing_ids is not None:
+                # Fetch latest matching posts from Ed
                 try:
-                    with open(json_path, 'w', encoding='utf-8') as f:
-                        json.dump(existing_posts, f, indent=2, ensure_ascii=False)
-                    print(f"  Saved updated posts JSON to {json_path}")
+                    scraped_posts = webscraper.process_threads(
+                        SEARCH_STRING, max_workers=args.workers, skip_ids=existing_ids
+                    )
                 except Exception as e:
-                    print(f"  Error writing {json_path}: {e}")
-            else:
-                print("  No new posts found. Using existing posts JSON.")
+                    print(f"  Error while scraping Ed posts: {e}")
+                    scraped_posts = []
+
+                # Keep only posts whose Ed thread id we haven't seen before (the
+                # scraper already skips known ids before downloading attachments)
+                new_posts = [p for p in scraped_posts if p.get('id') not in existing_ids]
+
+                if new_posts:
+                    print(f"  Found {len(new_posts)} new posts (out of {len(scraped_posts)} matching).")
+                    try:
+                        append_posts(json_path, new_posts)
+                        print(f"  Appended new posts to {json_path}")
+                    except Exception as e:
+                        print(f"  Error writing {json_path}: {e}")
+                else:
+                    print("  No new posts found. Using existing posts JSON.")
     elif not args.skip_scrape and webscraper is None:
         print("Warning: webscraper module not available; skipping Ed scrape.")
     
     # Run the ingestion pipeline
     try:
-        run_ingestion_pipeline(json_path=str(json_path), output_path=args.output)
+        run_ingestion_pipeline(
+            json_path=str(json_path),
+            output_path=args.output,
+            shared_layout_fit=args.shared_layout_fit
+        )
         print("\nIngestion pipeline completed successfully!")
     except Exception as e:
         print(f"\nError running ingestion pipeline: {e}")
@@ -5,24 +5,53 @@ Run this after starting the server to test all endpoints
 
 import requests
 import json
-from typing import Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, List, Tuple
 
 
 BASE_URL = "http://localhost:8000"
 
+# Independent tests in a category run concurrently
+MAX_WORKERS = 8
+
+# One pooled session so tests reuse connections instead of reconnecting per call
+SESSION = requests.Session()
+SESSION.mount('http://', HTTPAdapter(pool_connections=10, pool_maxsize=10))
+SESSION.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=10))
+
+# Per-thread output buffer so concurrent tests print in a stable order
+_output = threading.local()
+
 
 def print_test(name: str, success: bool, details: str = ""):
-    """Print test result"""
+    """Print test result (buffered when running under _run_test)"""
     symbol = "✓" if success else "✗"
-    print(f"{symbol} {name}")
+    lines = [f"{symbol} {name}"]
     if details:
-        print(f"  {details}")
+        lines.append(f"  {details}")
+    
+    buffer = getattr(_output, 'lines', None)
+    if buffer is None:
+        print("\n".join(lines))
+    else:
+        buffer.extend(lines)
+
+
+def _run_test(test_func) -> Tuple[bool, List[str]]:
+    """Run a test function and return its result with its buffered output"""
+    _output.lines = []
+    try:
+        return test_func(), _output.lines
+    finally:
+        _output.lines = None
 
 
 def test_health() -> bool:
     """Test health endpoint"""
     try:
-        response = requests.get(f"{BASE_URL}/health", timeout=5)
+        response = SESSION.get(f"{BASE_URL}/health", timeout=5)
         success = response.status_code == 200
         data = response.json()
         print_test(
@@ -39,7 +68,7 @@ def test_health() -> bool:
 def test_root() -> bool:
     """Test root endpoint"""
     try:
-        response = requests.get(f"{BASE_URL}/", timeout=5)
+        response = SESSION.get(f"{BASE_URL}/", timeout=5)
         success = response.status_code == 200
         data = response.json()
         print_test(
@@ -56,7 +85,7 @@ def test_root() -> bool:
 def test_stats() -> bool:
     """Test stats endpoint"""
     try:
-        response = requests.get(f"{BASE_URL}/api/stats", timeout=5)
+        response = SESSION.get(f"{BASE_URL}/api/stats", timeout=5)
         success = response.status_code == 200
         if success:
             data = response.json()
@@ -78,7 +107,7 @@ def test_stats() -> bool:
 def test_get_posts() -> bool:
     """Test get all posts endpoint"""
     try:
-        response = requests.get(f"{BASE_URL}/api/posts", timeout=10)
+        response = SESSION.get(f"{BASE_URL}/api/posts", timeout=10)
         success = response.status_code == 200
         if success:
             data = response.json()
@@ -99,13 +128,22 @@ def test_get_posts() -> bool:
 def test_graph_data() -> bool:
     """Test graph data endpoints"""
     all_success = True
+    view_modes = ['topic', 'tool', 'llm']
     
-    for view_mode in ['topic', 'tool', 'llm']:
+    def fetch(view_mode: str):
         try:
-            response = requests.get(
-                f"{BASE_URL}/api/graph-data/{view_mode}",
-                timeout=10
-            )
+            return SESSION.get(f"{BASE_URL}/api/graph-data/{view_mode}", timeout=10)
+        except Exception as e:
+            return e
+    
+    # Fetch all views at once, then report in order
+    with ThreadPoolExecutor(max_workers=len(view_modes)) as executor:
+        responses = list(executor.map(fetch, view_modes))
+    
+    for view_mode, response in zip(view_modes, responses):
+        try:
+            if isinstance(response, Exception):
+                raise response
             success = response.status_code == 200
             
             if success:
@@ -136,7 +174,7 @@ def test_search() -> bool:
     """Test search endpoint"""
     try:
         # Test POST endpoint
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/api/search",
             json={"query": "RNN", "view_mode": "topic", "limit": 10},
             timeout=10
@@ -159,7 +197,7 @@ def test_search() -> bool:
             )
         
         # Test GET endpoint
-        response2 = requests.get(
+        response2 = SESSION.get(
             f"{BASE_URL}/api/search",
             params={"q": "learning", "view_mode": "content", "limit": 5},
             timeout=10
@@ -191,17 +229,17 @@ def test_search() -> bool:
 def test_get_single_post() -> bool:
     """Test get single post endpoint"""
     try:
-        # First, get list of posts to find a valid ID
-        response = requests.get(f"{BASE_URL}/api/posts", timeout=10)
-        if response.status_code != 200 or not response.json():
+        # First, get one post to find a valid ID
+        response = SESSION.get(f"{BASE_URL}/api/posts", params={"limit": 1}, timeout=10)
+        posts = response.json() if response.status_code == 200 else []
+        if not posts:
             print_test("Get Single Post", False, "No posts available to test")
             return False
         
-        posts = response.json()
         test_post_id = posts[0]['id']
         
         # Now test getting single post
-        response = requests.get(
+        response = SESSION.get(
             f"{BASE_URL}/api/posts/{test_post_id}",
             timeout=5
         )
@@ -231,7 +269,7 @@ def test_get_single_post() -> bool:
 def test_invalid_view_mode() -> bool:
     """Test that invalid view mode returns error"""
     try:
-        response = requests.get(
+        response = SESSION.get(
             f"{BASE_URL}/api/graph-data/invalid",
             timeout=5
         )
@@ -250,7 +288,7 @@ def test_invalid_view_mode() -> bool:
 def test_interactive_docs() -> bool:
     """Test that interactive docs are accessible"""
     try:
-        response = requests.get(f"{BASE_URL}/docs", timeout=5)
+        response = SESSION.get(f"{BASE_URL}/docs", timeout=5)
         success = response.status_code == 200
         print_test(
             "Interactive Docs (Swagger)",
@@ -296,14 +334,17 @@ def main():
     total_tests = 0
     passed_tests = 0
     
-    for category, category_tests in tests:
-        print(f"\n{category}")
-        print("-" * 60)
-        
-        for test_func in category_tests:
-            total_tests += 1
-            if test_func():
-                passed_tests += 1
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        for category, category_tests in tests:
+            print(f"\n{category}")
+            print("-" * 60)
+            
+            for passed, lines in executor.map(_run_test, category_tests):
+                total_tests += 1
+                if lines:
+                    print("\n".join(lines))
+                if passed:
+                    passed_tests += 1
     
     print("\n" + "=" * 60)
     print(f"Results: {passed_tests}/{total_tests} tests passed")
@@ -327,3 +368,5 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         print("\n\nTest suite interrupted by user")
         sys.exit(1)
+    finally:
+        SESSION.close()
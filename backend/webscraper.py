@@ -1,51 +1,162 @@
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import orjson
+import hashlib
 import time
 import os
 import re
+import shutil
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+# RE2 scans in linear time with literal prefilters; fall back to re without it
+try:
+    import re2
+except ImportError:
+    re2 = re
+
 load_dotenv()
 
 ED_COURSE_ID = os.environ.get("ED_COURSE_ID")
 ED_API_TOKEN = os.environ.get("ED_API_KEY")
 SEARCH_STRING = "Special Participation E"        
-OUTPUT_FILE = "ed_posts.json"
+OUTPUT_FILE = "ed_posts.jsonl"
 ATTACHMENT_DIR = "attachments"   
+DOWNLOAD_CACHE_FILE = os.path.join(ATTACHMENT_DIR, ".cache.json")  # url -> local path
 
 BASE_URL = "https://us.edstem.org/api"
 
+DEFAULT_WORKERS = 16
+MAX_RETRIES = 5
+DOWNLOAD_CHUNK_SIZE = 64 * 1024  # Bytes read and written per attachment chunk
+WRITE_BUFFER_SIZE = 256 * 1024  # Short network reads are coalesced up to this before write()
+URL_HASH_CHARS = 10  # Hex digits of the URL hash added to attachment filenames
+
+# Thread listing pagination
+PAGE_LIMIT = 30
+PREFETCH_PAGES = 3
+REQUEST_INTERVAL = 0.5  # Minimum seconds between listing requests
+
+# <file url="..." filename="..." /> attachment tags in Ed's XML content
+_RE_FILE_TAG = re2.compile(r'<file\s+url="([^"]+)"\s+filename="([^"]+)"\s*/>')
+
+# Characters stripped from attachment filenames: anything but letters, digits,
+# space, '.', '_' and '-'
+_RE_UNSAFE_FILENAME = re.compile(r'[^\w .-]')
+
 headers = {
     "Authorization": f"Bearer {ED_API_TOKEN}",
     "Content-Type": "application/json"
 }
 
+# One pooled keep-alive session for API pages and attachment downloads, sized
+# for the concurrent download workers. Transient 5xx and connection errors are
+# retried here; 429s are handled by the backoff in fetch_thread_page. The auth
+# headers are passed per API request so they aren't sent to the file host
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=2 * DEFAULT_WORKERS,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[500, 502, 503, 504])
+)
+SESSION.mount('http://', _adapter)
+SESSION.mount('https://', _adapter)
+
+# Attachment URLs already downloaded, loaded from DOWNLOAD_CACHE_FILE on first use
+_download_cache = None
+_download_cache_lock = threading.Lock()
+
 def ensure_dir(directory):
-    if not os.path.exists(directory):
-        os.makedirs(directory)
+    os.makedirs(directory, exist_ok=True)
+
+def _load_download_cache():
+    """
+    Returns the url -> local path cache, reading it from disk the first time.
+    Callers must hold _download_cache_lock.
+    """
+    global _download_cache
+    if _download_cache is None:
+        try:
+            with open(DOWNLOAD_CACHE_FILE, 'rb') as f:
+                _download_cache = orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError):
+            _download_cache = {}
+    return _download_cache
+
+def get_cached_download(url, local_path):
+    """
+    Returns local_path if an earlier download of url was recorded there and the
+    file is still there. Entries pointing anywhere else (e.g. the shared,
+    unhashed filenames of older runs) are ignored so the URL is fetched again.
+    """
+    with _download_cache_lock:
+        cached_path = _load_download_cache().get(url)
+    if cached_path == local_path and os.path.exists(local_path):
+        return local_path
+    return None
+
+def remember_download(url, local_path):
+    """
+    Records a finished download and rewrites the cache file atomically.
+    Only call this once local_path holds the complete file.
+    """
+    with _download_cache_lock:
+        cache = _load_download_cache()
+        cache[url] = local_path
+        tmp_file = DOWNLOAD_CACHE_FILE + ".tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(orjson.dumps(cache))
+        os.replace(tmp_file, DOWNLOAD_CACHE_FILE)
+
+def attachment_path(url, filename):
+    """
+    Returns the local path for an attachment: its sanitized filename plus a
+    short hash of the URL, since several attachments share a filename.
+    """
+    safe_filename = _RE_UNSAFE_FILENAME.sub('', filename).strip()
+    stem, ext = os.path.splitext(safe_filename)
+    url_hash = hashlib.sha1(url.encode()).hexdigest()[:URL_HASH_CHARS]
+    return os.path.join(ATTACHMENT_DIR, f"{stem}-{url_hash}{ext}")
 
 def download_file(url, filename):
     """
-    Downloads a file from the given URL and saves it to ATTACHMENT_DIR.
+    Downloads a file from the given URL and saves it to ATTACHMENT_DIR
+    (created once by process_threads).
+    URLs downloaded before (this run or an earlier one) are not fetched again.
+    Each download is written to its own temp file and renamed into place, so
+    the path only ever holds a complete file.
     Returns the local path if successful, None otherwise.
     """
     try:
-        ensure_dir(ATTACHMENT_DIR)
-        
-        safe_filename = "".join([c for c in filename if c.isalpha() or c.isdigit() or c in (' ', '.', '_', '-')]).strip()
-        local_path = os.path.join(ATTACHMENT_DIR, safe_filename)
+        local_path = attachment_path(url, filename)
+        if get_cached_download(url, local_path):
+            print(f"    --> Already downloaded: {os.path.basename(local_path)}")
+            return local_path
         
+        print(f"    --> Downloading: {os.path.basename(local_path)}...")
         
-        print(f"    --> Downloading: {safe_filename}...")
+        tmp_path = f"{local_path}.part-{uuid.uuid4().hex}"
+        try:
+            # EdStem file URLs (static.us.edusercontent.com) usually don't need headers, 
+            # but passing them doesn't hurt.
+            with SESSION.get(url, stream=True) as r:
+                r.raise_for_status()
+                # Copy straight from the urllib3 response (still gzip-decoded) in
+                # large blocks, without a Python-level loop per chunk
+                r.raw.decode_content = True
+                with open(tmp_path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+                    shutil.copyfileobj(r.raw, f, DOWNLOAD_CHUNK_SIZE)
+            os.replace(tmp_path, local_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
         
-        # EdStem file URLs (static.us.edusercontent.com) usually don't need headers, 
-        # but passing them doesn't hurt.
-        with requests.get(url, stream=True) as r:
-            r.raise_for_status()
-            with open(local_path, 'wb') as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    f.write(chunk)
-                    
+        remember_download(url, local_path)
         return local_path
     except Exception as e:
         print(f"    [!] Failed to download {filename}: {e}")
@@ -55,10 +166,11 @@ def extract_attachments_from_xml(content_str):
     """
     Uses Regex to find <file url="..." filename="..." /> tags in the XML content.
     """
-    # Regex pattern to capture url and filename attributes
-    # Look for <file followed by attributes until closing />
-    pattern = r'<file\s+url="([^"]+)"\s+filename="([^"]+)"\s*/>'
-    matches = re.findall(pattern, content_str)
+    # Most bodies have no attachments; a literal search is cheaper than the regex
+    if '<file' not in content_str:
+        return []
+    
+    matches = _RE_FILE_TAG.findall(content_str)
     
     attachments = []
     for url, filename in matches:
@@ -68,82 +180,165 @@ def extract_attachments_from_xml(content_str):
         })
     return attachments
 
+def fetch_thread_page(url, params):
+    """
+    Fetches one page of the thread listing, backing off when rate-limited.
+    Returns the page's threads.
+    """
+    response = SESSION.get(url, headers=headers, params=params)
+    # Back off exponentially when Ed rate-limits us
+    for attempt in range(MAX_RETRIES):
+        if response.status_code != 429:
+            break
+        time.sleep(2 ** attempt)
+        response = SESSION.get(url, headers=headers, params=params)
+    response.raise_for_status()
+    data = orjson.loads(response.content)
+    return data.get('threads', [])
+
+class RateLimiter:
+    """
+    Hands out request slots at least interval seconds apart, across threads.
+    """
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def reserve(self):
+        """Reserves the next slot and returns the seconds to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._next_at - now)
+            self._next_at = max(now, self._next_at) + self.interval
+        return delay
+
 def get_threads(course_id):
-    offset = 0
-    limit = 30
+    """
+    Yields every thread in the course, newest first.
+    The next PREFETCH_PAGES pages download while the current one is consumed,
+    with request starts still spaced REQUEST_INTERVAL apart.
+    """
+    url = f"{BASE_URL}/courses/{course_id}/threads"
+    limiter = RateLimiter(REQUEST_INTERVAL)
+    done = threading.Event()
     print(f"[*] Starting scrape for course {course_id}...")
 
-    while True:
-        url = f"{BASE_URL}/courses/{course_id}/threads"
-        params = {"limit": limit, "offset": offset, "sort": "new"}
+    def fetch(offset):
+        # Prefetches still waiting for their slot are dropped once listing ends
+        if done.wait(limiter.reserve()):
+            return []
+        return fetch_thread_page(url, {"limit": PAGE_LIMIT, "offset": offset, "sort": "new"})
 
+    fetched = 0
+    with ThreadPoolExecutor(max_workers=PREFETCH_PAGES) as executor:
+        pending = deque(executor.submit(fetch, i * PAGE_LIMIT) for i in range(PREFETCH_PAGES))
+        next_offset = PREFETCH_PAGES * PAGE_LIMIT
         try:
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            data = response.json()
-            threads = data.get('threads', [])
-            
-            if not threads:
-                break
-            
-            for thread in threads:
-                yield thread
-            
-            offset += len(threads)
-            print(f"    Fetched {offset} threads so far...", end='\r')
-            time.sleep(0.5)
-            
-        except requests.exceptions.RequestException as e:
+            while pending:
+                threads = pending.popleft().result()
+                if not threads:
+                    break
+                
+                # Keep the window full before handing threads to the caller;
+                # a short page is the last one
+                if len(threads) == PAGE_LIMIT:
+                    pending.append(executor.submit(fetch, next_offset))
+                    next_offset += PAGE_LIMIT
+                
+                for thread in threads:
+                    yield thread
+                
+                fetched += len(threads)
+                print(f"    Fetched {fetched} threads so far...", end='\r')
+                
+                if len(threads) < PAGE_LIMIT:
+                    break
+                
+        # orjson raises its own JSONDecodeError (a ValueError) on an HTML or
+        # truncated error body, which isn't a RequestException
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
             print(f"\n[!] Error fetching threads: {e}")
-            break
+        finally:
+            done.set()
+            for future in pending:
+                future.cancel()
 
-def process_threads(substring):
-    results = []
+def build_post(thread, download_executor=None):
+    """
+    Builds the post record for a matching thread, downloading its attachments.
+    Attachments are downloaded concurrently on download_executor when given.
+    """
+    title = thread.get('title', '') or ''
+    body = thread.get('content', '') or ''
+    
+    user = thread.get('user', {})
+    author_name = user.get('name', 'Anonymous') if user else 'Anonymous'
+    
+    found_files = extract_attachments_from_xml(body)
+    
+    downloaded_files = []
+    if found_files:
+        print(f"\n[+] Found matching post: '{title}' with {len(found_files)} attachment(s)")
+        if download_executor is not None:
+            local_paths = list(download_executor.map(
+                lambda f: download_file(f['url'], f['filename']), found_files
+            ))
+        else:
+            local_paths = [download_file(f['url'], f['filename']) for f in found_files]
+        for f, local_path in zip(found_files, local_paths):
+            if local_path:
+                downloaded_files.append({
+                    'original_filename': f['filename'],
+                    'url': f['url'],
+                    'local_path': local_path
+                })
+
+    return {
+        'id': thread.get('id'),
+        'number': thread.get('number'),  # Sequential post number shown in UI
+        'title': title,
+        'author': author_name,
+        'date': thread.get('created_at'),
+        'content': body,
+        'attachments_downloaded': downloaded_files,
+        'url': f"https://edstem.org/us/courses/{ED_COURSE_ID}/discussion/{thread.get('id')}"
+    }
+
+def process_threads(substring, max_workers=DEFAULT_WORKERS, skip_ids=None):
+    """
+    Returns post records for threads whose title or body contains substring.
+    Threads whose id is in skip_ids are skipped before any attachment downloads.
+    """
     substring_lower = substring.lower()
+    skip_ids = skip_ids or set()
+    ensure_dir(ATTACHMENT_DIR)
     
-    count = 0
-    for thread in get_threads(ED_COURSE_ID):
-        title = thread.get('title', '') or ''
-        # Some threads have content directly, others might need a fetch. 
-        # Usually list endpoint has content snippets or full XML.
-        body = thread.get('content', '') or ''
-        
-        if substring_lower in title.lower() or substring_lower in body.lower():
+    # Attachment downloads are network-bound, so matching posts are built
+    # concurrently while later pages are still being listed, and each post's
+    # attachments download in parallel on a separate pool (separate so post
+    # workers waiting on downloads can't starve them)
+    futures = []
+    with ThreadPoolExecutor(max_workers=max_workers) as download_executor, \
+            ThreadPoolExecutor(max_workers=max_workers) as post_executor:
+        for thread in get_threads(ED_COURSE_ID):
+            if thread.get('id') in skip_ids:
+                continue
             
-            user = thread.get('user', {})
-            author_name = user.get('name', 'Anonymous') if user else 'Anonymous'
+            title = thread.get('title', '') or ''
+            # Some threads have content directly, others might need a fetch. 
+            # Usually list endpoint has content snippets or full XML.
+            body = thread.get('content', '') or ''
             
-            found_files = extract_attachments_from_xml(body)
-            
-            downloaded_files = []
-            if found_files:
-                print(f"\n[+] Found matching post: '{title}' with {len(found_files)} attachment(s)")
-                for f in found_files:
-                    local_path = download_file(f['url'], f['filename'])
-                    if local_path:
-                        downloaded_files.append({
-                            'original_filename': f['filename'],
-                            'url': f['url'],
-                            'local_path': local_path
-                        })
-            else:
-                pass
-
-            post_data = {
-                'id': thread.get('id'),
-                'number': thread.get('number'),  # Sequential post number shown in UI
-                'title': title,
-                'author': author_name,
-                'date': thread.get('created_at'),
-                'content': body,
-                'attachments_downloaded': downloaded_files,
-                'url': f"https://edstem.org/us/courses/{ED_COURSE_ID}/discussion/{thread.get('id')}"
-            }
-            
-            results.append(post_data)
-            count += 1
+            # Exact-case hits skip lowercasing the whole body
+            if (substring in title or substring in body
+                    or substring_lower in title.lower() or substring_lower in body.lower()):
+                futures.append(post_executor.submit(build_post, thread, download_executor))
+        
+        # Collected in submission order, which is the listing order
+        results = [future.result() for future in futures]
 
-    print(f"\n[*] Processing complete. Found {count} matching posts.")
+    print(f"\n[*] Processing complete. Found {len(results)} matching posts.")
     return results
 
 if __name__ == "__main__":
@@ -152,8 +347,12 @@ if __name__ == "__main__":
     else:
         matched_posts = process_threads(SEARCH_STRING)
         
-        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-            json.dump(matched_posts, f, indent=4, ensure_ascii=False)
+        # One post per line so later scrapes can append without rewriting.
+        # Written to a temp file and swapped in so a crash can't leave a torn file
+        tmp_file = OUTPUT_FILE + ".tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(b''.join(orjson.dumps(post, option=orjson.OPT_APPEND_NEWLINE) for post in matched_posts))
+        os.replace(tmp_file, OUTPUT_FILE)
             
         print(f"[*] Saved data to {OUTPUT_FILE}")
         print(f"[*] Saved attachments to folder: {ATTACHMENT_DIR}/")